@@ -0,0 +1,90 @@
+"""
+Compare the configuration lookups made by the calculate and upload
+loops: the previous ``conf.get()`` (which merged the settings on every
+call) against the resolved configuration.  Nothing touches the
+database.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import time
+
+from django.conf import settings
+from gradebook import conf
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = (
+    (
+        ["--loops"],
+        dict(type=int, default=100000, help="Loop iterations (default: 100000)"),
+    ),
+)
+
+###############################################################
+
+# the lookups made for each score by the calculate daemon:
+CALCULATE_SETTINGS = [
+    "calculate:pending-queue",
+    "calculate:notify-channel",
+    "statistics:cache-timeout",
+    "iclicker:map-timeout",
+]
+# the lookups made for each id by a marks upload:
+UPLOAD_SETTINGS = ["role_from_id", "pad:on-change"]
+
+###############################################################
+
+
+def legacy_get(setting):
+    """
+    The previous implementation of ``conf.get()`` (working on a copy
+    of the settings, so they are not changed).
+    """
+    assert setting in conf.DEFAULT, "the setting %r has no default value" % setting
+    app_settings = dict(getattr(settings, conf.CONFIG_NAME, conf.DEFAULT))
+    protected_name = conf.CONFIG_NAME + "_PROTECTED"
+    protected_settings = getattr(settings, protected_name, {})
+    app_settings.update(protected_settings)
+    return app_settings.get(setting, conf.DEFAULT[setting])
+
+
+###############################################################
+
+
+def _rate(get, setting_list, loops):
+    tick = time.time()
+    for i in range(loops):
+        for setting in setting_list:
+            get(setting)
+    elapsed = time.time() - tick
+    return loops / elapsed if elapsed else float("inf")
+
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    loops = options["loops"]
+    for name, setting_list in [
+        ("calculate", CALCULATE_SETTINGS),
+        ("upload", UPLOAD_SETTINGS),
+    ]:
+        before = _rate(legacy_get, setting_list, loops)
+        after = _rate(conf.get, setting_list, loops)
+        print(
+            "{0:<10} before: {1:.0f} loops/sec; after: {2:.0f} loops/sec".format(
+                name, before, after
+            )
+        )
+    differ = [s for s in conf.DEFAULT if legacy_get(s) != conf.get(s)]
+    if differ:
+        print("WARNING: settings differ:", ", ".join(differ))
+    elif verbosity > 1:
+        print("all", len(conf.DEFAULT), "settings agree")
+
+
+###############################################################
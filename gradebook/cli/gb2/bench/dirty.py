@@ -0,0 +1,96 @@
+"""
+Compare reverse dependency collection strategies for a ledger.
+All changes are rolled back.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import time
+
+from django.db import connection, transaction
+from gradebook.gb2.utils.dirty import (
+    dirty_reverse_deps,
+    reverse_dependency_ids_cte,
+    reverse_dependency_ids_frontier,
+)
+from gradebook.models import Score
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = (
+    (
+        ["--repeat"],
+        dict(type=int, default=3, help="Number of timing runs (default: 3)"),
+    ),
+    (
+        ["--task"],
+        dict(help="Seed with the scores of this task slug (default: all scores)"),
+    ),
+    (["slug"], dict(help="ledger slug")),
+)
+
+###############################################################
+
+
+class Rollback(Exception):
+    pass
+
+
+###############################################################
+
+
+def _timeit(func, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        result = func()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    repeat = max(1, options["repeat"])
+
+    seed_qs = Score.objects.filter(task__ledger__slug=options["slug"])
+    if options["task"]:
+        seed_qs = seed_qs.filter(task__slug=options["task"])
+    seed_ids = list(seed_qs.values_list("pk", flat=True))
+    if verbosity > 0:
+        print(len(seed_ids), "seed scores")
+
+    elapsed, rdeps = _timeit(
+        lambda: reverse_dependency_ids_frontier(seed_ids), repeat
+    )
+    print("frontier: {0:.4f}s ({1} reverse dependencies)".format(elapsed, len(rdeps)))
+    if connection.vendor == "postgresql":
+        elapsed, cte_rdeps = _timeit(
+            lambda: reverse_dependency_ids_cte(seed_ids), repeat
+        )
+        print(
+            "cte:      {0:.4f}s ({1} reverse dependencies)".format(
+                elapsed, len(cte_rdeps)
+            )
+        )
+        if cte_rdeps != rdeps:
+            print("WARNING: results differ!")
+    elif verbosity > 0:
+        print("cte: not available on", connection.vendor)
+
+    try:
+        with transaction.atomic():
+            elapsed, count = _timeit(lambda: dirty_reverse_deps(seed_ids), repeat)
+            print("dirty:    {0:.4f}s ({1} scores flagged)".format(elapsed, count))
+            raise Rollback()
+    except Rollback:
+        pass
+
+
+###############################################################
@@ -0,0 +1,231 @@
+"""
+Check that column-wise (numpy) formula evaluation gives exactly the
+same results as calculating one score at a time, on randomized
+gradebooks.  Nothing is saved.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+
+from gradebook.gb2.formulalib import (
+    AddCalc,
+    BinCalc,
+    BonusCalc,
+    CeilCalc,
+    DropCalc,
+    RankWeightCalc,
+    SumCalc,
+    WeightCalc,
+    formula_registry,
+)
+from gradebook.gb2.formulalib.formulacalc import SymbolTable
+from gradebook.gb2.formulalib.vector import numpy
+from gradebook.models import Formula
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = (
+    (
+        ["--rounds"],
+        dict(type=int, default=100, help="Number of random formulas (default: 100)"),
+    ),
+    (
+        ["--students"],
+        dict(type=int, default=200, help="Number of students (default: 200)"),
+    ),
+    (["--seed"], dict(type=int, help="Random seed")),
+)
+
+###############################################################
+
+BATCH_CLASSES = [
+    AddCalc,
+    BinCalc,
+    BonusCalc,
+    CeilCalc,
+    DropCalc,
+    RankWeightCalc,
+    SumCalc,
+    WeightCalc,
+]
+TASK_SLUGS = ["t1", "t2", "t3", "t4"]
+CATEGORY_SLUG = "cat"
+# The fraction of rounds where every category dependency is empty.
+EMPTY_CATEGORY_RATE = 0.2
+
+###############################################################
+
+
+class RandomScore(object):
+    """
+    Just enough of a score for formula calculations.
+    """
+
+    def __init__(self, pk, formula, full_marks):
+        self.pk = pk
+        self.formula = formula
+        self.full_marks = full_marks
+
+    def get_formula(self):
+        return self.formula
+
+    def get_full_marks(self):
+        return self.full_marks
+
+
+###############################################################
+
+
+def random_number(rng):
+    return rng.choice(
+        [
+            rng.randint(-5, 120),
+            round(rng.uniform(-5, 120), rng.randint(0, 3)),
+            rng.choice([0, 0.0, 1, 0.5, 100]),
+        ]
+    )
+
+
+def random_value(rng):
+    if rng.random() < 0.1:
+        return rng.choice(["", "abc", "-0", "0.0", "NS", "1e3", "nan", "inf"])
+    return "{}".format(random_number(rng))
+
+
+def random_full(rng):
+    return rng.choice(["", "", "0", "10", "25.5", "100", "abc"])
+
+
+def random_triplet(rng):
+    return (random_value(rng), random_full(rng), random_full(rng))
+
+
+def random_args(rng, type):
+    if type == WeightCalc.type_code:
+        return {
+            "weights": [
+                [slug, random_number(rng)]
+                for slug in rng.sample(TASK_SLUGS, rng.randint(1, 4))
+            ]
+        }
+    if type == SumCalc.type_code:
+        return {"src_category": CATEGORY_SLUG}
+    if type == AddCalc.type_code:
+        return {"src_tasks": rng.sample(TASK_SLUGS, rng.randint(0, 4))}
+    if type == DropCalc.type_code:
+        return {"src_category": CATEGORY_SLUG, "drop_count": rng.randint(0, 4)}
+    if type == RankWeightCalc.type_code:
+        return {
+            "src_category": CATEGORY_SLUG,
+            "rank_weights": [random_number(rng) for i in range(rng.randint(1, 5))],
+        }
+    if type == BinCalc.type_code:
+        bins = [
+            [random_number(rng), rng.choice([random_number(rng), "A", "B"])]
+            for i in range(rng.randint(1, 4))
+        ]
+        return {"src_task": rng.choice(TASK_SLUGS), "bins": bins}
+    if type in [CeilCalc.type_code, BonusCalc.type_code]:
+        args = {"src_task": rng.choice(TASK_SLUGS)}
+        if type == BonusCalc.type_code:
+            args["points"] = random_number(rng)
+        return args
+    raise RuntimeError("No random arguments for formula type " + type)
+
+
+def random_symbol_table(rng, formula, empty_categories=False):
+    table = SymbolTable()
+    for cls, slug in formula_registry.get_dependencies(formula):
+        if cls == "c":
+            size = 0 if empty_categories else rng.randint(0, 6)
+            table.add(slug, "c", [random_triplet(rng) for i in range(size)])
+        elif rng.random() < 0.1:
+            table.add(slug, "t", "not found")
+        else:
+            table.add(slug, "t", random_triplet(rng))
+    return table
+
+
+###############################################################
+
+
+def scalar_result(score, table):
+    try:
+        return "{}".format(formula_registry.calculate(score, symbol_table=table))
+    except Exception as e:
+        return "raised {}".format(e.__class__.__name__)
+
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    if numpy is None:
+        print("numpy is not installed; column-wise evaluation is not available.")
+        return
+    rng = random.Random(options["seed"])
+    type_list = [calc.type_code for calc in BATCH_CLASSES]
+    totals = {"rows": 0, "batch": 0, "mismatch": 0}
+    scalar_time = batch_time = 0.0
+    for n in range(options["rounds"]):
+        type = rng.choice(type_list)
+        formula = Formula(type=type, args=random_args(rng, type))
+        score_list = [
+            RandomScore(i, formula, random_full(rng))
+            for i in range(options["students"])
+        ]
+        # e.g., an empty category early in term:
+        empty_categories = rng.random() < EMPTY_CATEGORY_RATE
+        tables = [
+            random_symbol_table(rng, formula, empty_categories) for s in score_list
+        ]
+
+        tick = time.time()
+        expected = [scalar_result(s, t) for s, t in zip(score_list, tables)]
+        scalar_time += time.time() - tick
+        tick = time.time()
+        values = formula_registry.calculate_batch(formula, score_list, tables)
+        batch_time += time.time() - tick
+        if values is None:
+            if verbosity > 1:
+                print(type, formula.args, "-- not batched")
+            continue
+
+        totals["rows"] += len(values)
+        for score, value, result in zip(score_list, values, expected):
+            if value is None:
+                continue
+            totals["batch"] += 1
+            if "{}".format(value) != result:
+                totals["mismatch"] += 1
+                if verbosity > 0:
+                    print(
+                        "MISMATCH",
+                        type,
+                        formula.args,
+                        tables[score.pk],
+                        "full marks:",
+                        repr(score.full_marks),
+                        "scalar:",
+                        result,
+                        "batch:",
+                        value,
+                    )
+
+    print(
+        "{rows} scores; {batch} calculated column-wise; {mismatch} mismatches".format(
+            **totals
+        )
+    )
+    if verbosity > 1:
+        print(
+            "scalar: {0:.4f}s; column-wise: {1:.4f}s".format(scalar_time, batch_time)
+        )
+
+
+###############################################################
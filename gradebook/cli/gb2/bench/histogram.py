@@ -0,0 +1,115 @@
+"""
+Compare histogram rendering throughput: the in-process SVG renderer
+against the old gnuplot subprocess (when python-gnuplot-data is
+installed).  Uses random score values; nothing touches the database.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+
+from gradebook.utils import statistics
+
+try:
+    import gnuplot_data
+except ImportError:
+    gnuplot_data = None
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = (
+    (
+        ["--renders"],
+        dict(type=int, default=200, help="Number of renders (default: 200)"),
+    ),
+    (
+        ["--students"],
+        dict(type=int, default=300, help="Number of scores (default: 300)"),
+    ),
+    (["--size"], dict(default="500,350", help="Image size (default: 500,350)")),
+    (["--seed"], dict(type=int, help="Random seed")),
+)
+
+###############################################################
+
+
+class RandomScore(object):
+    def __init__(self, value):
+        self.value = value
+
+
+###############################################################
+
+
+def gnuplot_histogram(score_list, size):
+    """
+    The previous implementation of ``statistics.histogram_img()``.
+    """
+    count, count_all, values = statistics.get_numeric_scores(score_list)
+    if count < 1:
+        return
+    script = """set key off
+set style fill solid
+set style fill solid border -1
+binwidth=(%(max)s-%(min)s)/10
+set boxwidth binwidth
+set xrange [%(min)s-binwidth : %(max)s+binwidth]
+bin(x,width)=width*floor(x/width)
+""" % {
+        "max": max(values),
+        "min": min(values),
+    }
+    script += (
+        "plot '%(datafile)s' using (bin($1,binwidth)):(1.0) smooth freq with boxes lt 3"
+    )
+    terminal = "png transparent size " + size
+    img_data = gnuplot_data.Plot(data=values, script=script, terminal=terminal).plot()
+    if not img_data:
+        return
+    return img_data, "image/png"
+
+
+###############################################################
+
+
+def _rate(func, renders):
+    tick = time.time()
+    for i in range(renders):
+        func()
+    elapsed = time.time() - tick
+    return renders / elapsed if elapsed else float("inf")
+
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    rng = random.Random(options["seed"])
+    size = options["size"]
+    score_list = [
+        RandomScore("{0:.1f}".format(rng.gauss(70, 15)))
+        for i in range(options["students"])
+    ]
+    summary = statistics.summarize(score_list)
+
+    rate = _rate(lambda: statistics.histogram_img(score_list, size), options["renders"])
+    print("svg (from scores):  {0:.1f} renders/sec".format(rate))
+    rate = _rate(
+        lambda: statistics.histogram_from_summary(summary, size), options["renders"]
+    )
+    print("svg (from summary): {0:.1f} renders/sec".format(rate))
+    if gnuplot_data is None:
+        print("gnuplot: python-gnuplot-data is not installed")
+        return
+    rate = _rate(lambda: gnuplot_histogram(score_list, size), options["renders"])
+    print("gnuplot:            {0:.1f} renders/sec".format(rate))
+    if verbosity > 1:
+        data, mimetype = statistics.histogram_img(score_list, size)
+        print(mimetype, len(data), "bytes")
+
+
+###############################################################
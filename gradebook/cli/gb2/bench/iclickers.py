@@ -0,0 +1,102 @@
+"""
+Compare i>clicker id resolution for a session: the per-student and
+per-clicker queries against the in-memory i>clicker id map.  Uses the
+existing active registrations; nothing is changed.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+
+from gradebook.gb2.utils import iclickers
+from people.models import Person
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = (
+    (
+        ["--clickers"],
+        dict(type=int, default=300, help="Session size (default: 300)"),
+    ),
+    (["--seed"], dict(type=int, help="Random seed")),
+)
+
+###############################################################
+
+
+def by_query(person_ids, iclicker_ids):
+    """
+    The previous lookups: ``student.iclicker_set`` for each score, and
+    the ``Person`` join for rescoring.
+    """
+    from students.models import Student
+
+    result = {}
+    for person_id in person_ids:
+        try:
+            student = Student.objects.get(person_id=person_id)
+        except Student.DoesNotExist:
+            result[person_id] = set()
+            continue
+        result[person_id] = set(
+            student.iclicker_set.active().values_list("iclicker_id", flat=True)
+        )
+    persons = set(
+        Person.objects.filter(
+            student__iclicker__iclicker_id__in=iclicker_ids,
+            student__iclicker__active=True,
+        ).values_list("pk", flat=True)
+    )
+    return result, persons
+
+
+def by_map(person_ids, iclicker_ids):
+    result = dict(
+        (person_id, iclickers.iclicker_ids_for_person(person_id))
+        for person_id in person_ids
+    )
+    return result, iclickers.persons_for_iclickers(iclicker_ids)
+
+
+###############################################################
+
+
+def _timeit(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    rng = random.Random(options["seed"])
+    registrations = list(
+        iclickers.registration_queryset().values_list(
+            iclickers.person_field(), "iclicker_id"
+        )
+    )
+    rng.shuffle(registrations)
+    registrations = registrations[: options["clickers"]]
+    person_ids = set(person_id for person_id, iclicker_id in registrations)
+    iclicker_ids = set(iclicker_id for person_id, iclicker_id in registrations)
+    if verbosity > 0:
+        print(len(iclicker_ids), "i>clickers;", len(person_ids), "people")
+
+    elapsed, expected = _timeit(by_query, person_ids, iclicker_ids)
+    print("queries:        {0:.4f}s".format(elapsed))
+    iclickers.clear()
+    elapsed, result = _timeit(by_map, person_ids, iclicker_ids)
+    print("map (cold):     {0:.4f}s".format(elapsed))
+    elapsed, result = _timeit(by_map, person_ids, iclicker_ids)
+    print("map (warm):     {0:.4f}s".format(elapsed))
+    if result != expected:
+        print("WARNING: results differ!")
+
+
+###############################################################
@@ -0,0 +1,131 @@
+"""
+Compare resolving student ids one at a time (``Role.objects.from_id()``)
+against ``Role.objects.resolve_ids()``.  The ids are usernames, email
+addresses and student numbers of existing student roles, padded with
+unknown ids.  Nothing is changed.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+
+from django.db import connection, reset_queries
+from gradebook.models import Role
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = (
+    (
+        ["--ids"],
+        dict(type=int, default=2000, help="Number of ids (default: 2000)"),
+    ),
+    (
+        ["--hint"],
+        dict(help="Id hint, e.g., 'username' or 'student id' (default: none)"),
+    ),
+    (["--ledger"], dict(help="Only use the roles of this ledger slug")),
+    (["--seed"], dict(type=int, help="Random seed")),
+)
+
+###############################################################
+
+
+def sample_ids(role_qs, count, rng):
+    id_list = []
+    for username, address, student_number in role_qs.values_list(
+        "person__username",
+        "person__emailaddress__address",
+        "person__student__student_number",
+    ):
+        id_list.extend(
+            [v for v in (username, address, student_number) if v not in (None, "")]
+        )
+    id_list = list(set(id_list))
+    rng.shuffle(id_list)
+    id_list = id_list[:count]
+    while len(id_list) < count:
+        id_list.append("bench-unknown-{0}".format(rng.randint(0, 10 ** 9)))
+    return id_list
+
+
+###############################################################
+
+
+# stands in for the person of an ambiguous id when comparing results.
+AMBIGUOUS = "ambiguous"
+
+
+def resolve_one(role_qs, id_value, hint):
+    """
+    The per-id path.
+    """
+    person_set = set(role_qs.from_id(id_value, hint).values_list("person", flat=True))
+    if len(person_set) > 1:
+        return AMBIGUOUS
+    if not person_set:
+        return None
+    return role_qs.from_id(id_value, hint)[0].person
+
+
+def resolve_bulk(role_qs, id_list, hint):
+    person_map, ambiguous = role_qs.resolve_ids(id_list, hint)
+    for id_value in ambiguous:
+        person_map[id_value] = AMBIGUOUS
+    return person_map
+
+
+###############################################################
+
+
+def _timeit(func):
+    reset_queries()
+    start = time.time()
+    result = func()
+    elapsed = time.time() - start
+    return elapsed, len(connection.queries), result
+
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    rng = random.Random(options["seed"])
+    hint = options["hint"]
+    role_qs = Role.objects.active().filter(role="st")
+    if options["ledger"]:
+        role_qs = role_qs.filter(viewport__ledger__slug=options["ledger"])
+    id_list = sample_ids(role_qs, options["ids"], rng)
+    if verbosity > 0:
+        print(len(id_list), "ids")
+
+    # count the queries, even with DEBUG off.
+    connection.force_debug_cursor = True
+    try:
+        elapsed, queries, single = _timeit(
+            lambda: dict(
+                (id_value, resolve_one(role_qs, id_value, hint)) for id_value in id_list
+            )
+        )
+        print("from_id:     {0:.4f}s ({1} queries)".format(elapsed, queries))
+        elapsed, queries, bulk = _timeit(lambda: resolve_bulk(role_qs, id_list, hint))
+        print("resolve_ids: {0:.4f}s ({1} queries)".format(elapsed, queries))
+    finally:
+        connection.force_debug_cursor = False
+
+    differ = [id_value for id_value in id_list if single[id_value] != bulk[id_value]]
+    if differ:
+        print("WARNING: results differ for", len(differ), "ids!")
+        if verbosity > 1:
+            for id_value in differ:
+                print("\t", id_value, single[id_value], bulk[id_value])
+    if verbosity > 0:
+        found = len([v for v in bulk.values() if v not in (None, AMBIGUOUS)])
+        ambiguous = len([v for v in bulk.values() if v is AMBIGUOUS])
+        print(found, "found,", ambiguous, "ambiguous")
+
+
+###############################################################
@@ -0,0 +1,139 @@
+"""
+Time the calculate daemon with different numbers of workers, on
+synthetic ledgers.  The ledgers are created (and committed, so that the
+workers can see them) and deleted when finished.  PostgreSQL only.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+
+from django.db import connection
+from django.utils import timezone
+from gradebook.cli.gb2.score.calculate import loop_main, run_workers
+from gradebook.gb2.formulalib import WeightCalc
+from gradebook.models import Category, Formula, Ledger, Score, Task
+from people.models import Person
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = (
+    (
+        ["--ledgers"],
+        dict(type=int, default=8, help="Number of ledgers (default: 8)"),
+    ),
+    (
+        ["--students"],
+        dict(
+            type=int,
+            default=200,
+            help="Number of students per ledger (default: 200)",
+        ),
+    ),
+    (
+        ["--workers"],
+        dict(default="1,2,4", help="Worker counts to compare (default: 1,2,4)"),
+    ),
+    (["--seed"], dict(type=int, help="Random seed")),
+)
+
+###############################################################
+
+LEDGER_PREFIX = "bench-workers-"
+CATEGORY_SLUG = "bench-workers"
+LEAF_TASKS = ["A1", "A2", "A3", "A4"]
+BULK_CREATE_BATCH_SIZE = 1000
+
+###############################################################
+
+
+def create_ledger(n, category, formula, people, rng):
+    now = timezone.now()
+    ledger = Ledger.objects.create(
+        name="{0}{1}".format(LEDGER_PREFIX, n), dtstart=now, dtend=now
+    )
+    task_list = [
+        Task.objects.create(
+            name=name, category=category, ledger=ledger, full_marks="10"
+        )
+        for name in LEAF_TASKS
+    ]
+    total = Task.objects.create(
+        name="Total", category=category, ledger=ledger, formula=formula
+    )
+    score_list = []
+    for person in people:
+        for task in task_list:
+            value = "{0}".format(rng.randint(0, 10))
+            score_list.append(
+                Score(task=task, person=person, value=value, old_value=value)
+            )
+        score_list.append(
+            Score(
+                task=total,
+                person=person,
+                formula=formula,
+                old_value=Score.CALC_SENTINEL,
+            )
+        )
+    Score.objects.bulk_create(score_list, batch_size=BULK_CREATE_BATCH_SIZE)
+    return ledger
+
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    if connection.vendor != "postgresql":
+        print("Multiple workers require PostgreSQL advisory locks")
+        return
+    rng = random.Random(options["seed"])
+    worker_list = [int(w) for w in options["workers"].split(",")]
+    people = list(Person.objects.filter(active=True)[: options["students"]])
+    if not people:
+        print("No active people to score")
+        return
+
+    category, created = Category.objects.get_or_create(
+        slug=CATEGORY_SLUG, defaults={"name": CATEGORY_SLUG}
+    )
+    weights = [[name.lower(), 25] for name in LEAF_TASKS]
+    formula, created = Formula.objects.get_or_create_by_typeargs(
+        WeightCalc.type_code, {"weights": weights}
+    )
+    ledger_list = []
+    try:
+        for n in range(options["ledgers"]):
+            ledger_list.append(create_ledger(n, category, formula, people, rng))
+        score_qs = Score.objects.filter(task__ledger__in=ledger_list)
+        score_qs.stale_dependencies().resolve_dependencies()
+        total_qs = score_qs.filter(task__formula__isnull=False)
+        count = total_qs.count()
+        if verbosity > 0:
+            print(
+                "{0} ledgers; {1} calculated scores".format(len(ledger_list), count)
+            )
+
+        for workers in worker_list:
+            total_qs.update_for_recalc()
+            tick = time.time()
+            while total_qs.changed().exists():
+                run_workers(workers, loop_main, {"verbosity": 0})
+            elapsed = time.time() - tick
+            print(
+                "{0} workers: {1:.3f}s ({2:.1f} scores/sec)".format(
+                    workers, elapsed, count / elapsed if elapsed else 0
+                )
+            )
+    finally:
+        for ledger in ledger_list:
+            ledger.delete()
+        if not category.task_set.exists():
+            category.delete()
+
+
+###############################################################
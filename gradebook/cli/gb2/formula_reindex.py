@@ -0,0 +1,25 @@
+"""
+Rebuild the formula dependency reverse index.
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from gradebook.gb2.utils.formula_index import rebuild_index
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = ()
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    n = rebuild_index(verbosity=verbosity)
+    if verbosity > 0:
+        print("Reindexed {0} formulas".format(n))
+
+
+###############################################################
@@ -2,8 +2,8 @@ from __future__ import print_function, unicode_literals
 
 import students.utils.find_student
 from django.utils.timezone import now
+from gradebook.gb2.utils.iclickers import persons_for_iclickers
 from gradebook.models import Response, Role, Score
-from people.models import Person
 
 ###############################################################
 
@@ -81,13 +81,11 @@ def main(options, args):
     for iclicker in iclicker_list:
         # force a websync for registrations that do not exist...
         try:
-            students.utils.find_student.by_iclicker(iclicker_id)
+            students.utils.find_student.by_iclicker(iclicker)
         except:
             pass
     task_list = qs.values_list("task_id", flat=True)
-    person_list = Person.objects.filter(
-        student__iclicker__iclicker_id__in=iclicker_list
-    )
+    person_list = persons_for_iclickers(iclicker_list)
     score_list = Score.objects.filter(task__in=task_list, person_id__in=person_list)
 
     # TODO: consider a --force-all-no-really flag which sets
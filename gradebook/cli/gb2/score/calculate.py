@@ -4,6 +4,7 @@ Score calculator.
 from __future__ import print_function, unicode_literals
 
 import os
+import signal
 import sys
 from time import ctime, sleep, time
 from traceback import print_exc
@@ -11,11 +12,15 @@ from traceback import print_exc
 from django import db
 from django.db import models
 from django.utils import autoreload
+from gradebook.gb2.utils import locks, pending
+from gradebook.gb2.utils.notify import CalculateListener
 from gradebook.models import Score
 
 ###############################################################
 
 DEFAULT_DELAY = 1.0
+DEFAULT_POLL = 60.0
+DEFAULT_SWEEP = 600.0
 
 ###############################################################
 
@@ -30,12 +35,50 @@ OPTION_LIST = (
         dict(action="store_true", help="Repeat the polling forever (daemon mode)"),
     ),
     (["--autoreload"], dict(action="store_true", help="Autoreload on code changes")),
+    (
+        ["--workers"],
+        dict(
+            type=int,
+            default=1,
+            help="Number of worker processes; each ledger is processed by one worker at a time.  (PostgreSQL only.)",
+        ),
+    ),
+    (
+        ["--listen"],
+        dict(
+            action="store_true",
+            help="In daemon mode, wait for database notifications instead of polling every --delay seconds.  (PostgreSQL only.)",
+        ),
+    ),
+    (
+        ["--poll"],
+        dict(
+            type=float,
+            default=DEFAULT_POLL,
+            help="With --listen, the maximum number of seconds between cycles",
+        ),
+    ),
     (
         ["--delay"],
         dict(
             type=float, default=DEFAULT_DELAY, help="Number of seconds between cycles"
         ),
     ),
+    (
+        ["--queue"],
+        dict(
+            action="store_true",
+            help="Process the pending score queue (requires the calculate:pending-queue setting), instead of scanning for changed scores every cycle.",
+        ),
+    ),
+    (
+        ["--sweep"],
+        dict(
+            type=float,
+            default=DEFAULT_SWEEP,
+            help="With --queue, the number of seconds between full scans for changed scores",
+        ),
+    ),
     (
         ["--background"],
         dict(
@@ -60,7 +103,7 @@ def resolve_stale_dependencies(verbosity):
             print(ctime(), "resolving {0} dependencies...".format(n), end=" ")
             sys.stdout.flush()
         tick = time()
-        qs.resolve_dependencies()
+        qs.resolve_dependencies(verbosity=verbosity)
         tock = time()
         if verbosity > 1:
             print("depedency resolution took {0} sec".format(tock - tick))
@@ -91,23 +134,80 @@ def do_changed_calculations(verbosity):
 ###############################################################
 
 
-def loop_main(verbosity):
-    nd = resolve_stale_dependencies(verbosity)
-    nc = do_changed_calculations(verbosity)
+def process_queue(verbosity):
+    tick = time()
+    nd = pending.process_pending(
+        "deps", lambda qs: qs.resolve_dependencies(verbosity=verbosity)
+    )
+    nc = pending.process_pending("calc", lambda qs: qs.changed().calculate(verbosity))
+    tock = time()
+    if verbosity > 1 and (nd or nc):
+        print(
+            ctime(),
+            "queue: {0} dependencies; {1} calculations took {2} sec".format(
+                nd, nc, tock - tick
+            ),
+        )
+        sys.stdout.flush()
+    return nd, nc
+
+
+###############################################################
+
+
+def loop_main(verbosity, queue=False, sweep=True):
+    nd = nc = 0
+    if queue:
+        nd, nc = process_queue(verbosity)
+    if sweep:
+        nd += resolve_stale_dependencies(verbosity)
+        nc += do_changed_calculations(verbosity)
     if verbosity > 2:
-        print(ctime(), "+++ {1} dependencies; {1} calculations".format(nd, nc))
+        print(ctime(), "+++ {0} dependencies; {1} calculations".format(nd, nc))
         sys.stdout.flush()
 
 
 ###############################################################
 
 
-def daemon_main(verbosity=1, delay=DEFAULT_DELAY, traceback=False):
+def daemon_main(
+    verbosity=1,
+    delay=DEFAULT_DELAY,
+    traceback=False,
+    listen=False,
+    poll=DEFAULT_POLL,
+    queue=False,
+    sweep=DEFAULT_SWEEP,
+):
     if verbosity > 0:
         print(ctime(), "=== (Re)Starting daemon mode ===")
+    if queue and not pending.is_enabled():
+        print(ctime(), "The pending queue is not enabled; scanning instead.")
+        queue = False
+    last_sweep = None
+    listener = None
+    if listen:
+        listener = CalculateListener()
+        if not listener.is_available():
+            print(ctime(), "Notifications are not available; polling instead.")
+            listener = None
     while True:
+        waited = False
         try:
-            loop_main(verbosity)
+            if listener is not None:
+                # listen *before* checking, so nothing is missed.
+                listener.listen()
+            do_sweep = (
+                not queue or last_sweep is None or time() - last_sweep >= sweep
+            )
+            loop_main(verbosity, queue=queue, sweep=do_sweep)
+            if do_sweep:
+                last_sweep = time()
+            if listener is not None:
+                payloads = listener.wait(poll)
+                waited = True
+                if verbosity > 3:
+                    print(ctime(), "WAKE" if payloads else "POLL")
         except:
             if traceback:
                 print_exc(file=sys.stdout)
@@ -119,7 +219,8 @@ def daemon_main(verbosity=1, delay=DEFAULT_DELAY, traceback=False):
             print(ctime(), "Unhandled exception in main loop:")
             print_exc(file=sys.stdout)
 
-        sleep(delay)
+        if not waited:
+            sleep(delay)
         if verbosity > 3:
             print(ctime(), "BEAT")
         sys.stdout.flush()
@@ -128,6 +229,48 @@ def daemon_main(verbosity=1, delay=DEFAULT_DELAY, traceback=False):
 ###############################################################
 
 
+def run_workers(workers, target, kwargs):
+    """
+    Run ``target(**kwargs)`` in ``workers`` forked processes.
+    Ledgers are partitioned between the workers with advisory locks.
+    If any worker fails, the others are stopped.
+    """
+    # children must not share the parent's database connection.
+    db.connections.close_all()
+    children = set()
+    for n in range(workers):
+        pid = os.fork()
+        if pid == 0:  # child
+            status = 0
+            try:
+                target(**kwargs)
+            except:
+                print_exc(file=sys.stdout)
+                status = 1
+            sys.stdout.flush()
+            os._exit(status)
+        children.add(pid)
+
+    failed = False
+    try:
+        while children:
+            pid, status = os.wait()
+            children.discard(pid)
+            if status != 0 and not failed:
+                print(ctime(), "worker {0} failed; stopping".format(pid))
+                failed = True
+                for other in children:
+                    os.kill(other, signal.SIGTERM)
+    finally:
+        for other in children:
+            os.kill(other, signal.SIGTERM)
+            os.waitpid(other, 0)
+    return not failed
+
+
+###############################################################
+
+
 def main(options, args):
     verbosity = int(options["verbosity"])
     use_reloader = options["autoreload"]
@@ -141,6 +284,15 @@ def main(options, args):
         )
         return
 
+    workers = options["workers"]
+    if workers > 1:
+        if use_reloader:
+            print("Cannot run with both autoreload and multiple workers")
+            return
+        if not locks.is_available():
+            print("Multiple workers require PostgreSQL advisory locks")
+            return
+
     if options["pidfile"]:
         if options["autoreload"]:
             print("Cannot run with both autoreload and pidfile")
@@ -168,13 +320,26 @@ def main(options, args):
                 "verbosity": verbosity,
                 "delay": options["delay"],
                 "traceback": options["traceback"],
+                "listen": options["listen"],
+                "poll": options["poll"],
+                "queue": options["queue"],
+                "sweep": options["sweep"],
             }
             if use_reloader:
                 autoreload.main(daemon_main, args, kwargs)
+            elif workers > 1:
+                run_workers(workers, daemon_main, kwargs)
             else:
                 daemon_main(*args, **kwargs)
         else:
-            loop_main(verbosity)
+            kwargs = {
+                "verbosity": verbosity,
+                "queue": options["queue"] and pending.is_enabled(),
+            }
+            if workers > 1:
+                run_workers(workers, loop_main, kwargs)
+            else:
+                loop_main(**kwargs)
     finally:
         if options["pidfile"] and os.path.exists(options["pidfile"]):
             if int(open(options["pidfile"]).read()) == os.getpid():
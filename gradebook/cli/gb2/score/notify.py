@@ -0,0 +1,29 @@
+"""
+Wake up the calculate daemon (when running with --listen).
+"""
+###############################################################
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from gradebook.gb2.utils.notify import get_channel, notify_calculate
+
+DJANGO_COMMAND = "main"
+USE_ARGPARSE = True
+HELP_TEXT = __doc__.strip()
+OPTION_LIST = ((["payload"], dict(nargs="?", default="", help="Optional payload")),)
+
+###############################################################
+
+
+def main(options, args):
+    verbosity = int(options["verbosity"])
+    channel = get_channel()
+    if channel is None:
+        print("Notifications are not available.")
+        return
+    notify_calculate(options["payload"])
+    if verbosity > 0:
+        print("Notified", channel)
+
+
+###############################################################
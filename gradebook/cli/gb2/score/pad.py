@@ -1,6 +1,7 @@
 """
 Pad Scores so there is an entry for every student in good standing
-for every task.
+for every task.  This is a full reconciliation; normally scores are
+padded as roles and viewport tasks change.
 """
 ###############################################################
 from __future__ import print_function, unicode_literals
@@ -11,13 +12,11 @@ from time import ctime, sleep, time
 from traceback import print_exc
 
 from django import db
-from django.db import models
 from django.utils import autoreload
-from django.utils.timezone import now
-from gradebook import signals
-from gradebook.models import LedgerViewport, Role, Score
+from gradebook.gb2.utils import padding
 
-DEFAULT_DELAY = 60.0
+# Scores are padded as roles and viewports change; this is the fallback.
+DEFAULT_DELAY = 3600.0
 
 ###############################################################
 
@@ -51,9 +50,6 @@ OPTION_LIST = (
 
 ###############################################################
 
-# from course_role.models import Role
-# from classes.models import Section
-
 ###############################################################
 
 
@@ -61,57 +57,12 @@ def pad_scores(verbosity):
     if verbosity > 2:
         print("Padding scores as needed...")
         sys.stdout.flush()
-    # only pad for the current term:
-    dt = now()
-    #     role_qs = Role.objects.active().filter(person__active=True,
-    #                                     section__active=True,
-    #                                     section__course__active=True,
-    #                                     section__course__department__active=True,
-    #                                     dtstart__lte=dt, dtend__gt=dt)
-    role_qs = Role.objects.active().filter(
-        person__active=True,
-        viewport__active=True,
-        viewport__ledger__active=True,
-        dtstart__lte=dt,
-        dtend__gt=dt,
-    )
-    #     current_section_ids = role_qs.values_list('section_id', flat=True).distinct()
-    current_viewport_ids = role_qs.values_list("viewport_id", flat=True).distinct()
-    #     score_qs = Score.objects.filter(task__section_id__in=current_section_ids)
-    score_qs = Score.objects.filter(task__ledgerviewport__in=current_viewport_ids)
-
     tick = time()
-
-    # tr: task, role/person pairs
-    #     tr_all = Section.objects.filter(id__in=current_section_ids
-    #                         ).values_list('task__id', 'registration_list__id')
-    tr_all = LedgerViewport.objects.filter(
-        id__in=current_viewport_ids, role__role="st"
-    ).values_list("tasks__id", "role__person_id")
-    #    tr = set(filter(lambda (t,r): (t is not None) and (r is not None), tr_all))
-    tr = set([(t, r) for t, r in tr_all if (t is not None) and (r is not None)])
-    s_tr = set(score_qs.values_list("task_id", "person_id"))
-    create_tr = tr.difference(s_tr)
-    if create_tr:
-        #         create_list = [Score(task_id=t, student_registration_id=r,
-        #                              value="", old_value="~") for t,r in create_tr]
-        create_list = [
-            Score(task_id=t, person_id=p, value="", old_value="~") for t, p in create_tr
-        ]
-        Score.objects.bulk_create(create_list)
-        for s in create_list:
-            signals.score_post_save(
-                sender="gradebook.cli.gb2.score.pad",
-                instance=s,
-                created=True,
-                raw=False,
-            )
-
+    n = padding.pad_all()
     tock = time()
     if verbosity > 2:
         print("Pad scores total time {0} sec".format(tock - tick))
         sys.stdout.flush()
-    n = len(create_tr)
     if n > 0 and verbosity > 1:
         print("created {0} score objects".format(n))
         sys.stdout.flush()
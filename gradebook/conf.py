@@ -6,6 +6,8 @@ is not present in your settings.
 from __future__ import print_function, unicode_literals
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from gradebook.utils.gradebook_ledger import (
     default_ledger_from_section,
     default_role_from_id,
@@ -84,10 +86,75 @@ DEFAULT = {
     # Further note: any function mapping a single float to a single float
     #    is allowable. (In math-ese, any f: R -> R, where None is the identity).
     "api:grade-import-fix": None,
+    # PostgreSQL only: the LISTEN/NOTIFY channel used to wake up the
+    #   calculate daemon (``gb2.score.calculate --listen``) when scores
+    #   are flagged for calculation.  ``None`` disables notifications.
+    "calculate:notify-channel": "gradebook_calculate",
+    # Also record flagged scores in the ScorePending work queue, for
+    #   the calculate daemon ``--queue`` mode.
+    "calculate:pending-queue": False,
+    # Pad scores as student roles are saved and tasks are added to
+    #   viewports.  (``gb2.score.pad`` is then only needed occasionally,
+    #   for changes which bypass signals.)
+    "pad:on-change": True,
+    # How long (in seconds) the score list pages may cache task
+    #   statistics and histograms, in the default Django cache.  (Entries
+    #   are invalidated when scores or roles change.)  0 disables this.
+    "statistics:cache-timeout": 24 * 60 * 60,
+    # The longest (in seconds) a process may use its in-memory map of
+    #   i>clicker id registrations (for response matching) before
+    #   reloading it.  With the students app integration, the map is
+    #   also reloaded whenever a registration is saved or deleted.
+    #   0 disables the map.
+    "iclicker:map-timeout": 5 * 60,
+    # How long (in seconds) the gradebook views may cache a person's
+    #   available and selected roles for a viewport, in the
+    #   default Django cache; e.g., a minute, when grades are released.
+    #   Entries are dropped when the person's roles are saved or deleted;
+    #   other changes may take this long to be seen.  0 disables this.
+    "views:role-cache-timeout": 0,
 }
 
 #########################################################################
 
+# The resolved configuration; rebuilt when the settings change.
+_resolved = None
+
+#########################################################################
+
+
+def _resolve():
+    """
+    The DEFAULT configuration, updated with the named _CONFIG
+    dictionary, then the protected settings.
+    """
+    resolved = dict(DEFAULT)
+    protected_name = CONFIG_NAME + "_PROTECTED"
+    for app_settings in [
+        getattr(settings, CONFIG_NAME, {}),
+        getattr(settings, protected_name, {}),
+    ]:
+        resolved.update((k, v) for k, v in app_settings.items() if k in DEFAULT)
+    return resolved
+
+
+def _get_resolved():
+    global _resolved
+    resolved = _resolved
+    if resolved is None:
+        resolved = _resolved = _resolve()
+    return resolved
+
+
+@receiver(setting_changed)
+def _setting_changed(sender, setting, **kwargs):
+    global _resolved
+    if setting in [CONFIG_NAME, CONFIG_NAME + "_PROTECTED"]:
+        _resolved = None
+
+
+#########################################################################
+
 
 def get(setting):
     """
@@ -97,21 +164,14 @@ def get(setting):
     retrieve.
     """
     assert setting in DEFAULT, "the setting %r has no default value" % setting
-    app_settings = getattr(settings, CONFIG_NAME, DEFAULT)
-    protected_name = CONFIG_NAME + "_PROTECTED"
-    protected_settings = getattr(settings, protected_name, {})
-    app_settings.update(protected_settings)
-    return app_settings.get(setting, DEFAULT[setting])
+    return _get_resolved()[setting]
 
 
 def get_all():
     """
     Return all current settings as a dictionary.
     """
-    app_settings = getattr(settings, CONFIG_NAME, DEFAULT)
-    return dict(
-        [(setting, app_settings.get(setting, DEFAULT[setting])) for setting in DEFAULT]
-    )
+    return dict(_get_resolved())
 
 
 #########################################################################
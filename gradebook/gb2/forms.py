@@ -7,12 +7,12 @@ from __future__ import print_function, unicode_literals
 import json
 from datetime import datetime
 
-import spreadsheet
 from datetimepicker.widgets import DateTimePicker
 from django import forms
 from django.contrib.admin.widgets import FilteredSelectMultiple
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import transaction
 from django.db.models import Q
 from django.forms.models import inlineformset_factory
 from django.utils.html import mark_safe
@@ -37,12 +37,15 @@ from ..utils import bubblesheet
 from ..utils import iclicker as iclicker_csv
 from ..utils import iclicker_xml, marks_upload, unslugify
 from .formulalib import formula_registry
-from .utils.export import score_data as export_score_data
+from .utils.export import score_rows as export_score_rows
+from .utils.responses import match_responses
 from .validators import validate_spreadsheet
 
 #################################################################
 
 SCORE_SIZE = 6
+# uploaded responses are inserted this many at a time.
+RESPONSE_BATCH_SIZE = 500
 
 #################################################################
 
@@ -379,9 +382,9 @@ class BulkResponseForm(forms.Form):
         ``role`` is the current role of the uploader in the given ``viewport``.
         ``data`` is a file field.
 
-        This method must return a list of Response data dictionaries,
-        i.e., ``Response(**kwargs)`` should be valid for each element
-        of the results.
+        This method must return a list (or other iterable) of Response
+        data dictionaries, i.e., ``Response(**kwargs)`` should be valid
+        for each element of the results.
 
         At a minimum, this should set the ``student_id``, ``score``, and
         ``response_string`` values.
@@ -390,45 +393,54 @@ class BulkResponseForm(forms.Form):
             "BulkResponseForm subclasses must implement file_to_response_data()"
         )
 
-    def build_responses(self, viewport, role):
+    def iter_response_records(self, viewport, role):
         """
-        Use to build the responses.
+        Generates the response data dictionaries, with the ``task`` and
+        ``description`` filled in.
         """
-        results = []
         data = self.cleaned_data["file"]
         if not data:
-            keys = self.cleaned_data.keys()
             raise RuntimeError("This form is not bound to an uploaded file.")
 
-        task_list = []
         for record in self.file_to_response_data(viewport, role, data):
             if "task" not in record:
                 record["task"] = self.get_task(viewport, role, data)
             if "description" not in record:
                 record["description"] = self.get_description(viewport, data)
-            if record["task"] not in task_list:
-                task_list.append(record["task"])
-            results.append(record)
-
-        return [Response(**r) for r in results], task_list
+            yield record
 
     def bulk_create(self, viewport, role):
         """
         Call only when ``form.is_valid()``.
         Call as ``form.bulk_create(section, role)``.
+        The responses are inserted in batches, as they are read.
+        Returns the number of responses created.
         """
-        response_list, task_list = self.build_responses(viewport, role)
-        # clear any old responses first:
-        # NOTE: This only works when the task is given; but the task
-        #   can be None also.
-        old_responses = Response.objects.filter(task__in=task_list)
-        old_responses.delete()
-        # create the new response objects:
-        result = Response.objects.bulk_create(response_list)
-        # mark all scores for task for recalculation.
+        count = 0
+        task_list = []
+        response_list = []
+        with transaction.atomic():
+            for record in self.iter_response_records(viewport, role):
+                if record["task"] not in task_list:
+                    task_list.append(record["task"])
+                    # clear any old responses first:
+                    # NOTE: This only works when the task is given; but the
+                    #   task can be None also.
+                    Response.objects.filter(task__in=[record["task"]]).delete()
+                response_list.append(Response(**record))
+                if len(response_list) >= RESPONSE_BATCH_SIZE:
+                    Response.objects.bulk_create(response_list)
+                    count += len(response_list)
+                    response_list = []
+            Response.objects.bulk_create(response_list)
+            count += len(response_list)
+        # match the responses now, rather than one score at a time in
+        #   the calculate daemon; and mark any other scores for the task
+        #   for recalculation.
         score_list = Score.objects.filter(task__in=task_list)
-        score_list.update_for_recalc()
-        return result
+        matched = match_responses(score_list)
+        score_list.exclude(pk__in=matched).update_for_recalc()
+        return count
 
 
 #################################################################
@@ -798,19 +810,16 @@ class BubblesheetResponseForm(MultisectionMixin, BulkResponseForm):
 
     def _parse(self, data):
         """
-        Parse the file, save results.
+        Parse the file; returns the course info and a generator of the
+        score records (the file is read as these are generated).
         """
-        if getattr(self, "_parse_complete", False):
-            return self._course_info, self._score_records
         #         print("{!r} {!r}".format(data.name, data))
-        course_info, score_records = bubblesheet.parse_file(
+        course_info, score_records = bubblesheet.iter_file(
             data.name, data, verbosity=0, solution=None, check=False
         )
         self._course_info = course_info
         self.course_info_json = json.dumps(course_info)
-        self._score_records = score_records
-        self._parse_complete = True
-        return self._course_info, self._score_records
+        return self._course_info, score_records
 
     def file_to_response_data(self, viewport, role, data):
         """
@@ -832,8 +841,8 @@ class BubblesheetResponseForm(MultisectionMixin, BulkResponseForm):
         self.task_name = self.cleaned_data["task"].name
         data = self.cleaned_data["file"]
         course_info, score_records = self._parse(data)
-        result = [self._record_to_response(r) for r in score_records]
-        return [r for r in result if r is not None]
+        result = (self._record_to_response(r) for r in score_records)
+        return (r for r in result if r is not None)
 
     def clean_file(self):
         """
@@ -846,7 +855,9 @@ class BubblesheetResponseForm(MultisectionMixin, BulkResponseForm):
             )
 
         try:
-            self._parse(data)
+            course_info, score_records = self._parse(data)
+            for record in score_records:
+                pass
         except Exception as e:
             raise forms.ValidationError(
                 _("There was an error with your file. %(parse_error)s"),
@@ -986,10 +997,10 @@ class SpreadsheetExportForm(forms.Form):
             )
         return super(SpreadsheetExportForm, self).clean(*args, **kwargs)
 
-    def response_data(self):
+    def response_rows(self):
         """
         Called only after form.is_valid() by views.
-        Returns a format/data pair.
+        Returns a format/row generator pair.
         """
         style = self.cleaned_data["style"]
         good_standing = self.cleaned_data["good_standing"]
@@ -1021,7 +1032,7 @@ class SpreadsheetExportForm(forms.Form):
                     name = name.replace(c, bad_d2l_replace)
                 return name + " Points Grade"
 
-        data = export_score_data(
+        rows = export_score_rows(
             self.viewport,
             good_standing=good_standing,
             task_label=task_label,
@@ -1029,7 +1040,7 @@ class SpreadsheetExportForm(forms.Form):
             streg_pre_fields=streg_pre_fields,
             streg_post_fields=streg_post_fields,
         )
-        return format, spreadsheet.sheetWriter(data, format)
+        return format, rows
 
 
 #################################################################
@@ -13,6 +13,7 @@ from __future__ import print_function, unicode_literals
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import numpy
 
 ###############################################################
 
@@ -64,5 +65,20 @@ class AddCalc(FormulaCalc):
 
         return round(result, ndigits)
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``.
+        """
+        if not self.args["src_tasks"]:
+            # empty task list
+            return ["NS"] * matrix.n
+        result = numpy.zeros(matrix.n)
+        for t in self.args["src_tasks"]:
+            value, full = matrix.task(t)
+            result = result + value
+        return matrix.finish(result, ndigits)
+
 
 ###############################################################
@@ -17,6 +17,7 @@ from django.utils import six
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import numpy
 
 NUMERIC_TYPES = six.integer_types + (float, complex)
 
@@ -79,5 +80,40 @@ class BinCalc(FormulaCalc):
         else:
             return result
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``; only the binning is vectorized.
+        """
+        bins = self.args["bins"]
+        real_types = six.integer_types + (float,)
+        if not bins or not all(isinstance(t, real_types) for t, v in bins):
+            return None
+        src_value, full = matrix.task(self.args["src_task"])
+        index = numpy.full(matrix.n, -1)
+        for i, (threshold, value) in enumerate(bins):
+            index = numpy.where(src_value >= threshold, i, index)
+
+        full_marks, has_fm = matrix.full_marks()
+        outof = bins[-1][1]
+        output = []
+        for i, b in enumerate(index.tolist()):
+            result = bins[b][1] if b >= 0 else 0
+            if has_fm[i] and isinstance(outof, NUMERIC_TYPES):
+                if not isinstance(result, NUMERIC_TYPES) or outof == 0:
+                    # TypeError, ZeroDivisionError are left to ``calculate``
+                    matrix.fallback[i] = True
+                    output.append(None)
+                    continue
+                result = result * full_marks[i].item() / outof
+            if matrix.fallback[i]:
+                output.append(None)
+            elif isinstance(result, NUMERIC_TYPES):
+                output.append(round(result, ndigits))
+            else:
+                output.append(result)
+        return output
+
 
 ###############################################################
@@ -12,9 +12,11 @@ Arg explaination:
 ###############################################################
 from __future__ import print_function, unicode_literals
 
+from django.utils import six
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import numpy
 
 ###############################################################
 
@@ -63,5 +65,17 @@ class BonusCalc(FormulaCalc):
         result = src_value + self.args["points"]
         return round(result, ndigits)
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``.
+        """
+        points = self.args["points"]
+        if not isinstance(points, six.integer_types + (float,)):
+            return None
+        src_value, full = matrix.task(self.args["src_task"])
+        return matrix.finish(src_value + points, ndigits)
+
 
 ###############################################################
@@ -15,6 +15,7 @@ from math import ceil
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import numpy
 
 ###############################################################
 
@@ -61,5 +62,18 @@ class CeilCalc(FormulaCalc):
         result = ceil(src_value)
         return round(result, ndigits)
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``.
+        """
+        src_value, full = matrix.task(self.args["src_task"])
+        result = numpy.where(matrix.fallback, 0.0, numpy.ceil(src_value))
+        return [
+            None if fallback else round(int(value), ndigits)
+            for fallback, value in zip(matrix.fallback, result.tolist())
+        ]
+
 
 ###############################################################
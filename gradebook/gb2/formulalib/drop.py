@@ -15,6 +15,7 @@ from __future__ import print_function, unicode_literals
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import accumulate, normalized, numpy
 
 ###############################################################
 
@@ -89,5 +90,35 @@ class DropCalc(FormulaCalc):
 
         return round(result, ndigits)
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``.
+        """
+        full_marks, normalize = matrix.full_marks()
+        value, full, present = matrix.category(self.args["src_category"])
+        value = normalized(matrix, value, full, present, normalize)
+
+        remaining = present.copy()
+        rows = numpy.arange(matrix.n)
+        for i in range(self.args["drop_count"]):
+            has_any = remaining.any(axis=1)
+            if not has_any.any():
+                # (including a zero width matrix: nothing in the category.)
+                break
+            # the first occurence of the minimum, as list.remove() does.
+            candidates = numpy.where(remaining, value, numpy.inf)
+            index = numpy.argmin(candidates, axis=1)
+            remaining[rows[has_any], index[has_any]] = False
+
+        count = remaining.sum(axis=1)
+        result = accumulate(value, remaining)
+        with numpy.errstate(all="ignore"):
+            result = numpy.where(normalize, result * full_marks / count, result)
+        # in the above, it's possible for everything to get removed...
+        errors = [0.0 if c == 0 else None for c in count]
+        return matrix.finish(result, ndigits, errors)
+
 
 ###############################################################
@@ -163,19 +163,34 @@ class FormulaCalc(object):
             "FormulaCalc objects must implement the calculate method"
         )
 
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Optional: the column-wise version of ``calculate`` for the
+        scores of a ``vector.DependencyMatrix``; see ``vector.py``.
+        Returns a list of results (``None`` for any row which must
+        be done by ``calculate``), or ``None`` if not supported.
+        """
+        return None
+
     def begin_calc(self, dependency_qs):
         """
         Call this at the beginning of every calculate implementation
         """
         self.get_symbol_table(dependency_qs)
 
-    def calculate_formula(self, score, ndigits=None):
+    def calculate_formula(self, score, ndigits=None, symbol_table=None):
         """
         What should be called outside.
+        ``symbol_table`` may be given when the caller has already
+        assembled the dependency values (e.g., batch calculations);
+        otherwise it is built from the score dependencies.
         """
         if ndigits is None:
             ndigits = self.ndigits
-        self.begin_calc(score.dependencies.active())
+        if symbol_table is not None:
+            self.symbol_table = symbol_table
+        else:
+            self.begin_calc(score.dependencies.active())
         return self.calculate(score, ndigits)
 
     def get_dependencies(self):
@@ -45,34 +45,29 @@ class IClickerCalc(FormulaCalc):
         of Responses.
         """
         debug = False
-        from students.models import Student
+        from ..utils.iclickers import iclicker_ids_for_person
 
-        try:
-            student = score.person.student
-        except Student.DoesNotExist:
-            if debug:
-                print("Person has no associated student; bailing!")
-            # right now; i>clickers must work through a student record...
-            return None
+        # right now; i>clickers must work through a student record...
+        iclicker_ids = iclicker_ids_for_person(score.person_id)
         if debug:
             print("task =", score.task)
+            print("\t", list(iclicker_ids))
+        if not iclicker_ids:
+            return None
 
         from gradebook.models import Response
 
         response_list = Response.objects.active().filter(task=score.task)
         if debug:
             print("response_list count() is", response_list.count())
-        iclicker_list = student.iclicker_set.active()
+        # (more than one match is as good as none.)
+        student_responses = list(
+            response_list.filter(student_id__in=list(iclicker_ids))[:2]
+        )
         if debug:
-            print("iclicker_list count() is", iclicker_list.count())
-        iclicker_ids = iclicker_list.values_list("iclicker_id", flat=True)
-        if debug:
-            print("\t", list(iclicker_ids))
-        student_responses = response_list.filter(student_id__in=iclicker_ids)
-        if debug:
-            print("sutdent_reponses count() is", student_responses.count())
-        if student_responses.count() == 1:
-            response = student_responses.get()
+            print("sutdent_reponses count() is", len(student_responses))
+        if len(student_responses) == 1:
+            response = student_responses[0]
             response.scored = True
             response.save()
             if debug:
@@ -23,6 +23,7 @@ from itertools import zip_longest
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import has_signed_zero, normalized, numpy
 
 ###############################################################
 
@@ -68,7 +69,7 @@ class RankWeightCalc(FormulaCalc):
         value_list = self.symbol_table.get_value(
             self.args["src_category"], transform=self.float0, normalize=normalize
         )
-        weight_list = self.args["rank_weights"]
+        weight_list = list(self.args["rank_weights"])
         ranked_values = sorted(value_list, reverse=True)
 
         ranked_len = len(ranked_values)
@@ -91,5 +92,47 @@ class RankWeightCalc(FormulaCalc):
 
         return round(result, ndigits)
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``.
+        """
+        weights = list(self.args["rank_weights"])
+        if not weights:
+            return None
+        full_marks, normalize = matrix.full_marks()
+        value, full, present = matrix.category(self.args["src_category"])
+        value = normalized(matrix, value, full, present, normalize)
+        matrix.fallback |= has_signed_zero(value, present)
+
+        # descending, with missing values last:
+        ranked = -numpy.sort(-numpy.where(present, value, -numpy.inf), axis=1)
+        count = present.sum(axis=1)
+        width = max(ranked.shape[1], len(weights))
+        length = numpy.maximum(count, len(weights))
+        result = numpy.zeros(matrix.n)
+        for i in range(width):
+            w = weights[i] if i < len(weights) else weights[-1]
+            if i < ranked.shape[1]:
+                v = numpy.where(i < count, ranked[:, i], 0.0)
+            else:
+                v = numpy.zeros(matrix.n)
+            with numpy.errstate(all="ignore"):
+                result = numpy.where(i < length, result + w * v, result)
+
+        errors = [None] * matrix.n
+        outof_cache = {}
+        outof = numpy.zeros(matrix.n)
+        for i, c in enumerate(count.tolist()):
+            if c not in outof_cache:
+                outof_cache[c] = sum(weights + [weights[-1]] * (c - len(weights)))
+            outof[i] = outof_cache[c]
+            if normalize[i] and outof[i] == 0.0:
+                errors[i] = "error ZwS"
+        with numpy.errstate(all="ignore"):
+            result = numpy.where(normalize, result * full_marks / outof, result)
+        return matrix.finish(result, ndigits, errors)
+
 
 ###############################################################
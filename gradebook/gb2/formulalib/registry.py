@@ -4,16 +4,25 @@ FormulaRegistry -- the place formulas get registered to.
 ###############################################################
 from __future__ import print_function, unicode_literals
 
+import copy
 import json
+from collections import OrderedDict
 
 from django.core.exceptions import ImproperlyConfigured
 from django.utils import six
 
+from .vector import DependencyMatrix, numpy
+
 if six.PY2:
     from exceptions import Exception
 
 ###############################################################
 
+# The maximum number of formulas with cached FormulaCalc objects.
+FORMULA_CACHE_SIZE = 256
+
+###############################################################
+
 
 class NoValueChange(Exception):
     """
@@ -30,16 +39,20 @@ class FormulaRegistry(object):
     Registry for formula tyes.
     """
 
-    def __init__(self):
+    def __init__(self, cache_size=FORMULA_CACHE_SIZE):
         self._registry = {}
+        # formula pk -> ((digest, type), formula calc object); in LRU order.
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
 
     def register(self, formula_calc_class):
         # if type(formula_calc) == type(object):
         #    formula_calc = formula_calc()
         key = formula_calc_class.get_formula_code()
         self._registry[key] = formula_calc_class
+        self.clear_cache()
 
-    def _get_obj(self, formula):
+    def _make_obj(self, formula):
         formula_calc_class = self._registry.get(formula.type, None)
         if formula_calc_class is None:
             raise ImproperlyConfigured(
@@ -53,6 +66,46 @@ class FormulaRegistry(object):
                 obj.args = {}
         return obj
 
+    def _get_proto(self, formula):
+        """
+        Returns the (shared) formula calc object for this formula;
+        these must not be used directly for calculation.
+        The digest is checked, as formulas may be changed by another
+        process.
+        """
+        version = (formula.digest, formula.type)
+        entry = self._cache.pop(formula.pk, None)
+        if entry is not None and entry[0] == version:
+            self._cache[formula.pk] = entry
+            return entry[1]
+
+        obj = self._make_obj(formula)
+        # dependencies never change for given args:
+        obj.dependencies = obj.get_dependencies()
+        if formula.pk is not None:
+            self._cache[formula.pk] = (version, obj)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return obj
+
+    @staticmethod
+    def _copy(proto):
+        obj = copy.copy(proto)
+        obj.symbol_table = None
+        return obj
+
+    def _get_obj(self, formula):
+        return self._copy(self._get_proto(formula))
+
+    def invalidate(self, formula_id):
+        """
+        Drop any cached objects for the given formula.
+        """
+        self._cache.pop(formula_id, None)
+
+    def clear_cache(self):
+        self._cache.clear()
+
     @property
     def type_list(self):
         """
@@ -78,19 +131,32 @@ class FormulaRegistry(object):
         if formula.type not in self.type_list:
             return False
         # check that the args are appropriate for this type.
-        formula_calc = self._get_obj(formula)
+        # Note: not cached, this is used when the args are being edited.
+        formula_calc = self._make_obj(formula)
         return formula_calc.is_valid()
 
     def get_dependencies(self, formula):
+        return self._get_proto(formula).dependencies
+
+    def calculate_batch(self, formula, score_list, symbol_tables):
+        """
+        Column-wise ``calculate`` for scores sharing ``formula``;
+        requires numpy.  Returns a list of values (``None`` for any
+        score which must be calculated individually), or ``None`` if
+        this is not supported.
+        """
+        if numpy is None:
+            return None
         formula_calc = self._get_obj(formula)
-        return formula_calc.get_dependencies()
+        matrix = DependencyMatrix(score_list, symbol_tables)
+        return formula_calc.calculate_batch(matrix, formula_calc.ndigits)
 
-    def calculate(self, score):
+    def calculate(self, score, symbol_table=None):
         formula = score.get_formula()
         if formula is None:
             raise NoValueChange
         formula_calc = self._get_obj(formula)
-        value = formula_calc.calculate_formula(score)
+        value = formula_calc.calculate_formula(score, symbol_table=symbol_table)
         if value is None:
             value = ""
         return value
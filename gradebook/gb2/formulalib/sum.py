@@ -12,6 +12,7 @@ from __future__ import print_function, unicode_literals
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import accumulate, numpy
 
 ###############################################################
 
@@ -69,5 +70,25 @@ class SumCalc(FormulaCalc):
 
         return round(result, ndigits)
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``.
+        """
+        value, full, present = matrix.category(self.args["src_category"])
+        result = accumulate(value, present)
+        empty = ~present.any(axis=1)
+        errors = ["NS" if e else None for e in empty]
+
+        full_marks, has_fm = matrix.full_marks()
+        outof = accumulate(full, present)
+        # ZeroDivisionError is left to ``calculate``:
+        matrix.fallback |= has_fm & ~empty & (outof == 0.0)
+        with numpy.errstate(all="ignore"):
+            result = numpy.where(has_fm, result * full_marks / outof, result)
+
+        return matrix.finish(result, ndigits, errors)
+
 
 ###############################################################
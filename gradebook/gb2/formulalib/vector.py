@@ -0,0 +1,167 @@
+"""
+Column-wise (vectorized) formula evaluation.
+
+Formula classes may implement ``calculate_batch(matrix, ndigits)``,
+which evaluates an entire column of scores sharing a formula at once.
+This requires numpy, which is optional: when it is not installed,
+formulas are always evaluated one score at a time.
+
+Batch results must be *identical* to ``calculate()``; in particular,
+sums are accumulated one dependency at a time, in the same order, and
+rounding is done with the builtin ``round()``.  Any row which cannot be
+reproduced exactly (non-finite values, division by zero errors, ...)
+is returned as ``None``, and is evaluated with ``calculate()`` instead.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from .formulacalc import FormulaCalc
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+###############################################################
+
+
+class DependencyMatrix(object):
+    """
+    The symbol tables of a list of scores, as arrays.
+    Rows are scores; missing category entries are NaN.
+    Non-numeric values are 0.0, as with ``FormulaCalc.float0``.
+    """
+
+    float0 = staticmethod(FormulaCalc.float0)
+    floatNone = staticmethod(FormulaCalc.floatNone)
+
+    def __init__(self, score_list, symbol_tables):
+        self.n = len(score_list)
+        self.score_list = score_list
+        self.symbol_tables = symbol_tables
+        # rows which must be evaluated by ``calculate()``:
+        self.fallback = numpy.zeros(self.n, dtype=bool)
+        self._full_marks = None
+
+    def check_finite(self, *arrays):
+        for a in arrays:
+            bad = ~numpy.isfinite(a)
+            if a.ndim > 1:
+                bad = bad.any(axis=1)
+            self.fallback |= bad
+
+    def full_marks(self):
+        """
+        Returns the full marks of each score (NaN for ``None``), and the
+        mask of rows which have full marks.
+        """
+        if self._full_marks is None:
+            fm_list = [self.floatNone(s.get_full_marks()) for s in self.score_list]
+            has_fm = numpy.array([fm is not None for fm in fm_list], dtype=bool)
+            full_marks = numpy.array(
+                [numpy.nan if fm is None else fm for fm in fm_list], dtype=float
+            )
+            self.fallback |= has_fm & ~numpy.isfinite(full_marks)
+            self._full_marks = full_marks, has_fm
+        return self._full_marks
+
+    def _entries(self, slug, cls):
+        for i, table in enumerate(self.symbol_tables):
+            entry_cls, entry = table.get(slug, (None, None))
+            if entry_cls != cls:
+                self.fallback[i] = True
+                yield i, None
+            else:
+                yield i, entry
+
+    def task(self, slug):
+        """
+        Returns the (value, full) arrays for a task dependency.
+        """
+        value = numpy.zeros(self.n)
+        full = numpy.zeros(self.n)
+        for i, entry in self._entries(slug, "t"):
+            if entry is not None:
+                value[i] = self.float0(entry[0])
+                full[i] = self.float0(entry[1] or entry[2])
+        self.check_finite(value, full)
+        return value, full
+
+    def category(self, slug):
+        """
+        Returns the (value, full, present) arrays for a category
+        dependency.  Entries are left aligned, in their original order.
+        """
+        rows = [entry or [] for i, entry in self._entries(slug, "c")]
+        width = max([len(r) for r in rows] or [0])
+        value = numpy.full((self.n, width), numpy.nan)
+        full = numpy.full((self.n, width), numpy.nan)
+        present = numpy.zeros((self.n, width), dtype=bool)
+        for i, row in enumerate(rows):
+            for j, e in enumerate(row):
+                value[i, j] = self.float0(e[0])
+                full[i, j] = self.float0(e[1] or e[2])
+                present[i, j] = True
+        self.check_finite(
+            numpy.where(present, value, 0.0), numpy.where(present, full, 0.0)
+        )
+        return value, full, present
+
+    def finish(self, result, ndigits, errors=None):
+        """
+        Returns the list of results, as ``calculate()`` would.
+        """
+        output = []
+        for i, value in enumerate(result.tolist()):
+            if self.fallback[i]:
+                output.append(None)
+            elif errors is not None and errors[i] is not None:
+                output.append(errors[i])
+            else:
+                output.append(round(value, ndigits))
+        return output
+
+
+###############################################################
+
+
+def accumulate(value, mask):
+    """
+    Row sums of ``value`` where ``mask`` is set, added one column at a
+    time (i.e., exactly as ``sum()`` would).
+    """
+    result = numpy.zeros(value.shape[0])
+    with numpy.errstate(all="ignore"):
+        for j in range(value.shape[1]):
+            result = numpy.where(mask[:, j], result + value[:, j], result)
+    return result
+
+
+###############################################################
+
+
+def normalized(matrix, value, full, present, normalize):
+    """
+    The value/full ratios for the rows in ``normalize``, as
+    ``SymbolTable.get_value(..., normalize=True)`` would give.
+    Division by zero is left to ``calculate()``.
+    """
+    rows = normalize[:, None] & present
+    with numpy.errstate(all="ignore"):
+        result = numpy.where(rows, value / full, value)
+    matrix.fallback |= (rows & (full == 0.0)).any(axis=1)
+    matrix.check_finite(numpy.where(present, result, 0.0))
+    return result
+
+
+###############################################################
+
+
+def has_signed_zero(value, present):
+    """
+    Rows with a ``-0.0`` entry; sorting may not preserve these.
+    """
+    return (present & (value == 0.0) & numpy.signbit(value)).any(axis=1)
+
+
+###############################################################
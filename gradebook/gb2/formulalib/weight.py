@@ -17,6 +17,7 @@ from __future__ import print_function, unicode_literals
 from django.utils.translation import ugettext_lazy as _
 
 from .formulacalc import FormulaCalc
+from .vector import numpy
 
 ###############################################################
 
@@ -78,5 +79,36 @@ class WeightCalc(FormulaCalc):
 
         return round(result, ndigits)
 
+    ###################################################
+
+    def calculate_batch(self, matrix, ndigits):
+        """
+        Column-wise ``calculate``.
+        """
+        if not self.args["weights"]:
+            return None
+        key_list, weight_list = zip(*self.args["weights"])
+        result = numpy.zeros(matrix.n)
+        errors = [None] * matrix.n
+        for key, weight in zip(key_list, weight_list):
+            value, full = matrix.task(key)
+            for i in numpy.flatnonzero(full == 0.0):
+                if errors[i] is None:
+                    errors[i] = "error OoZ:" + key
+            with numpy.errstate(all="ignore"):
+                result = result + (weight * value) / full
+
+        full_marks, has_fm = matrix.full_marks()
+        outof = sum(weight_list)
+        if outof == 0.0:
+            for i in numpy.flatnonzero(has_fm):
+                if errors[i] is None:
+                    errors[i] = "error DbZ"
+        else:
+            with numpy.errstate(all="ignore"):
+                result = numpy.where(has_fm, result * full_marks / outof, result)
+
+        return matrix.finish(result, ndigits, errors)
+
 
 ###############################################################
@@ -0,0 +1,321 @@
+"""
+Batch calculation of scores.
+
+Rather than calculating (and cascading) one score at a time, the scores,
+dependency edges and formulas of each affected ledger are loaded in a
+handful of queries.  Pending calculations are then evaluated in dependency
+order, in memory, and the results are written back in bulk.
+Where possible, scores sharing a formula are evaluated column-wise.
+
+The results are the same as calling ``Score.calculate()`` for each
+changed score.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from ...models import Formula, Score, Task
+from ..formulalib import NoValueChange, formula_registry
+from . import taskstats
+from .locks import try_ledger_lock
+from .symbols import build_symbol_table
+from .topsort import LedgerGraph
+
+###############################################################
+
+BULK_UPDATE_BATCH_SIZE = 500
+# The smallest number of scores sharing a formula to calculate column-wise.
+BATCH_MIN_SCORES = 16
+
+###############################################################
+
+
+def _task_sort_key(task):
+    """
+    Mirror the default ordering of a dependency queryset:
+    scores are ordered by task, i.e., ``Task.Meta.ordering``.
+    """
+    return (task.ordering, task.category.ordering, task.category.name, task.name)
+
+
+def _triplet(score):
+    return score.value, score.full_marks, score.task.full_marks
+
+
+###############################################################
+
+
+def _set_value(score, value):
+    # as it will be stored in the database:
+    value = "{}".format(value)
+    updated = value != score.value
+    score.value = value
+    return updated
+
+
+def _finish_score(score, updated, verbosity=0):
+    score.old_value = score.value
+    if verbosity > 2:
+        print('Score "{score.task.slug}#{score.pk}" = {score.value}'.format(score=score))
+    return updated
+
+
+###############################################################
+
+
+def calculate_score(score, symbol_table, verbosity=0):
+    """
+    The in-memory equivalent of ``Score.calculate(cascade=False,
+    commit=False)``, with a prebuilt symbol table.
+    Returns ``True`` if dependent scores need to be recalculated.
+    """
+    if score.get_formula() is None:
+        # this score has no formula
+        updated = True
+    else:
+        try:
+            value = formula_registry.calculate(score, symbol_table=symbol_table)
+            if verbosity > 3:
+                print(
+                    'Score#{score.pk} got calculate value "{value}"'.format(
+                        score=score, value=value
+                    )
+                )
+        except NoValueChange:
+            updated = False
+        else:
+            updated = _set_value(score, value)
+    return _finish_score(score, updated, verbosity)
+
+
+###############################################################
+
+
+def calculate_column(score_list, symbol_tables, verbosity=0):
+    """
+    Calculate scores which do not depend on one another.  Scores
+    sharing a formula are calculated column-wise, when the formula
+    supports it (see ``formulalib/vector.py``).
+    Returns the list of ``calculate_score()`` results.
+    """
+    groups = defaultdict(list)
+    for i, score in enumerate(score_list):
+        formula = score.get_formula()
+        groups[None if formula is None else formula.pk].append(i)
+
+    results = [None] * len(score_list)
+    for formula_id, index_list in groups.items():
+        values = None
+        if formula_id is not None and len(index_list) >= BATCH_MIN_SCORES:
+            values = formula_registry.calculate_batch(
+                score_list[index_list[0]].get_formula(),
+                [score_list[i] for i in index_list],
+                [symbol_tables[i] for i in index_list],
+            )
+        for n, i in enumerate(index_list):
+            score = score_list[i]
+            if values is None or values[n] is None:
+                results[i] = calculate_score(score, symbol_tables[i], verbosity)
+            else:
+                updated = _set_value(score, values[n])
+                results[i] = _finish_score(score, updated, verbosity)
+    return results
+
+
+###############################################################
+
+
+class LedgerCalculation(object):
+    """
+    The in-memory state for calculating the pending scores of a single
+    ledger.
+    ``seed_ids`` are the primary keys of the scores which were flagged
+    for calculation; anything depending on these is also recalculated,
+    as required.
+    """
+
+    def __init__(self, ledger_id, seed_ids, verbosity=0):
+        self.ledger_id = ledger_id
+        self.seed_ids = set(seed_ids)
+        self.verbosity = verbosity
+        self.tasks = {}
+        self.scores = {}
+        self.graph = None
+        self._formula_deps = {}
+        self._task_keys = {}
+
+    def load(self):
+        """
+        Load the tasks, formulas, scores and dependency edges for this
+        ledger.
+        """
+        self.tasks = (
+            Task.objects.filter(ledger_id=self.ledger_id)
+            .select_related("category")
+            .in_bulk()
+        )
+        score_qs = (
+            Score.objects.filter(task__ledger_id=self.ledger_id)
+            .filter(Q(active=True) | Q(pk__in=self.seed_ids))
+            .select_related(None)
+            .order_by()
+        )
+        score_list = list(score_qs)
+
+        formula_ids = set(t.formula_id for t in self.tasks.values())
+        formula_ids.update(s.formula_id for s in score_list)
+        formula_ids.discard(None)
+        formulas = Formula.objects.in_bulk(formula_ids)
+
+        # attach the shared instances, so that ``get_formula()`` and
+        #   ``get_full_marks()`` do not hit the database.
+        for task in self.tasks.values():
+            task.formula = formulas.get(task.formula_id)
+            self._task_keys[task.pk] = _task_sort_key(task)
+        for score in score_list:
+            score.task = self.tasks[score.task_id]
+            score.formula = formulas.get(score.formula_id)
+            self.scores[score.pk] = score
+
+        through = Score.dependencies.through
+        edge_qs = through.objects.filter(
+            from_score__task__ledger_id=self.ledger_id
+        ).values_list("from_score_id", "to_score_id")
+        self.graph = LedgerGraph(
+            (
+                (from_id, to_id)
+                for from_id, to_id in edge_qs.iterator()
+                if from_id in self.scores and to_id in self.scores
+            ),
+            inactive=[pk for pk, s in self.scores.items() if not s.active],
+        )
+
+    def get_formula_dependencies(self, formula):
+        if formula.pk not in self._formula_deps:
+            self._formula_deps[formula.pk] = formula_registry.get_dependencies(
+                formula
+            )
+        return self._formula_deps[formula.pk]
+
+    def build_symbol_table(self, score, formula):
+        """
+        The in-memory equivalent of ``FormulaCalc.build_symbol_table``.
+        """
+        dep_list = [
+            self.scores[pk]
+            for pk in self.graph.dependencies[score.pk]
+            if self.scores[pk].active
+        ]
+        dep_list.sort(key=lambda s: (self._task_keys[s.task_id], s.pk))
+        dep_rows = [
+            (s.task.slug, s.task.category_id, _triplet(s)) for s in dep_list
+        ]
+        return build_symbol_table(self.get_formula_dependencies(formula), dep_rows)
+
+    def get_symbol_table(self, score):
+        formula = score.get_formula()
+        if formula is None:
+            return None
+        return self.build_symbol_table(score, formula)
+
+    def calculate(self):
+        """
+        Evaluate the pending scores in dependency order, one level of
+        the dependency graph at a time.
+        Returns the list of scores which require saving.
+        """
+        pending = self.graph.reverse_reachable(
+            [pk for pk in self.seed_ids if pk in self.scores]
+        )
+        levels = {}
+        by_level = defaultdict(list)
+        for pk in self.graph.order(pending):
+            dep_levels = [
+                levels[d] for d in self.graph.dependencies[pk] if d in levels
+            ]
+            levels[pk] = max(dep_levels) + 1 if dep_levels else 0
+            by_level[levels[pk]].append(pk)
+
+        updated = set()
+        results = []
+        for level in sorted(by_level):
+            score_list = [
+                self.scores[pk]
+                for pk in by_level[level]
+                if pk in self.seed_ids
+                or any(d in updated for d in self.graph.dependencies[pk])
+            ]
+            # (otherwise, nothing the score depends on has changed.)
+            symbol_tables = [self.get_symbol_table(s) for s in score_list]
+            flags = calculate_column(score_list, symbol_tables, self.verbosity)
+            for score, flag in zip(score_list, flags):
+                if flag:
+                    updated.add(score.pk)
+                results.append(score)
+        return results
+
+    def save(self, score_list):
+        Score.objects.bulk_update(
+            score_list, ["value", "old_value"], batch_size=BULK_UPDATE_BATCH_SIZE
+        )
+        taskstats.task_changed([s.task_id for s in score_list])
+
+
+###############################################################
+
+
+def calculate_ledger(ledger_id, seed_ids, verbosity=0):
+    """
+    Calculate the given scores of a single ledger, along with anything
+    that depends on them.
+    Returns the number of scores saved.
+    """
+    calc = LedgerCalculation(ledger_id, seed_ids, verbosity=verbosity)
+    calc.load()
+    score_list = calc.calculate()
+    if score_list:
+        calc.save(score_list)
+    if verbosity > 2:
+        print(
+            "Ledger #{0}: {1} seed scores; {2} scores saved".format(
+                ledger_id, len(seed_ids), len(score_list)
+            )
+        )
+    return len(score_list)
+
+
+###############################################################
+
+
+def calculate_queryset(queryset, verbosity=0):
+    """
+    Calculate the scores of a queryset (with cascades), one ledger at a
+    time.  Ledgers locked by another worker are skipped; the scores of
+    each ledger are only determined once it has been locked.
+    Returns the number of scores saved.
+    """
+    ledger_ids = set(
+        queryset.order_by().values_list("task__ledger_id", flat=True).distinct()
+    )
+    count = 0
+    for ledger_id in sorted(ledger_ids):
+        with transaction.atomic():
+            if not try_ledger_lock(ledger_id):
+                if verbosity > 2:
+                    print("Ledger #{0}: busy, skipped".format(ledger_id))
+                continue
+            seed_ids = set(
+                queryset.filter(task__ledger_id=ledger_id)
+                .order_by()
+                .values_list("pk", flat=True)
+            )
+            if seed_ids:
+                count += calculate_ledger(ledger_id, seed_ids, verbosity=verbosity)
+    return count
+
+
+###############################################################
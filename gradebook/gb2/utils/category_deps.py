@@ -1,8 +1,10 @@
 ############################################################################
 from __future__ import print_function, unicode_literals
 
-from ...models import Formula, Score
-from ..formulalib import formula_registry
+from django.db import models
+
+from ...models import Score
+from .formula_index import dependent_formulas
 
 ############################################################################
 
@@ -15,19 +17,43 @@ def category_deps(ledger, person, category_slug, verbosity=0):
     have that category as a src_category?  
     If so, flag that as an unresolved dependency.
     """
+    return category_deps_bulk(ledger, [(person, category_slug)], verbosity=verbosity)
+
+
+############################################################################
+
+
+def category_deps_bulk(ledger, pair_list, verbosity=0):
+    """
+    As ``category_deps()``, for many ``(person, category_slug)`` pairs
+    in the same ledger (e.g., after ``bulk_create()``).
+    A ``person`` of ``None`` means every person.
+    The dependent formulas are looked up in the reverse index, and the
+    affected scores are flagged with one pair of updates.
+    """
+    by_slug = {}
+    for person, category_slug in pair_list:
+        person_id = getattr(person, "pk", person)
+        by_slug.setdefault(category_slug, set()).add(person_id)
+    if not by_slug:
+        return
+
+    dep_sets = dependent_formulas("c", by_slug)
+    if verbosity > 2:
+        print("dep_sets = {}".format(dep_sets))
+    if not dep_sets:
+        return
+
     #     score_list = Score.objects.filter(task__section=section).active().has_formula()
     score_list = Score.objects.filter(task__ledger=ledger).active().has_formula()
-    if person is not None:
-        score_list = score_list.filter(person=person)
-    formula_list = score_list.get_formula_queryset()
-    dep_set = set()  # set of category dependency formulas.
-    for f in formula_list:
-        for t, s in formula_registry.get_dependencies(f):
-            if t == "c" and s == category_slug:
-                dep_set.add(f)
-    if verbosity > 2:
-        print("dep_set = {}".format(dep_set))
-    affected_scores = score_list.formula_filter(dep_set)
+    q = models.Q()
+    for category_slug, dep_set in dep_sets.items():
+        person_ids = by_slug[category_slug]
+        q_slug = models.Q(formula__in=dep_set) | models.Q(task__formula__in=dep_set)
+        if None not in person_ids:
+            q_slug &= models.Q(person__in=person_ids)
+        q |= q_slug
+    affected_scores = score_list.filter(q)
     if affected_scores.exists():
         if verbosity > 2:
             print(
@@ -8,12 +8,15 @@ which is then used to determine execution order of calculations.
 from __future__ import print_function, unicode_literals
 
 import operator
+from collections import defaultdict
 from functools import reduce
 
-from django.db import models
+from django.db import models, transaction
 
-from ...models import Category, Score, Task
+from ...models import Category, Formula, Score, Task
 from ..formulalib import formula_registry
+from .dirty import dirty_reverse_deps
+from .locks import try_ledger_lock
 
 ###############################################################
 
@@ -107,6 +110,126 @@ def update_instance(obj, verbosity=0, propogate_task_deps=True):
             score.update_deps_from_task()
 
 
+###############################################################
+
+BULK_CREATE_BATCH_SIZE = 1000
+
+###############################################################
+
+
+def _score_dependency_map(formula, ledger_id, verbosity=0):
+    """
+    Resolve the dependencies of ``formula`` for every person in the
+    ledger with a single query.
+    Returns a dictionary ``{person_id: [score_id, ...]}``.
+    """
+    dep_primitives = formula_registry.get_dependencies(formula)
+    dep_task_slugs = [slug for depmodel, slug in dep_primitives if depmodel == "t"]
+    dep_category_slugs = [slug for depmodel, slug in dep_primitives if depmodel == "c"]
+    or_queries = []
+    if dep_task_slugs:
+        or_queries.append(models.Q(task__slug__in=dep_task_slugs))
+    if dep_category_slugs:
+        or_queries.append(models.Q(task__category_id__in=dep_category_slugs))
+    if verbosity > 2:
+        print(
+            "formula {0}, ledger {1}: dep_primitives = {2}".format(
+                formula.pk, ledger_id, dep_primitives
+            )
+        )
+
+    result = defaultdict(list)
+    if not or_queries:
+        return result
+    qs = (
+        Score.objects.filter(task__ledger_id=ledger_id)
+        .filter(reduce(operator.or_, or_queries))
+        .select_related(None)
+        .order_by()
+        .values_list("person_id", "pk")
+    )
+    for person_id, pk in qs.iterator():
+        result[person_id].append(pk)
+    return result
+
+
+###############################################################
+
+
+def resolve_scores(queryset, verbosity=0):
+    """
+    Set the dependencies for a queryset of Scores, one task at a time.
+
+    This gives the same result as calling ``resolve_dependencies()`` on
+    each score, but the dependencies are computed once per
+    (formula, ledger) for all people, and the through table is updated
+    with one delete and one bulk insert per task.
+    Returns the number of scores resolved.
+    """
+    by_task = defaultdict(list)
+    changed = set()
+    formula_ids = set()
+    qs = (
+        queryset.select_related(None)
+        .order_by()
+        .values_list(
+            "pk",
+            "person_id",
+            "task_id",
+            "task__ledger_id",
+            "formula_id",
+            "task__formula_id",
+            "value",
+            "old_value",
+        )
+    )
+    for pk, person_id, task_id, ledger_id, s_formula_id, t_formula_id, v, ov in qs:
+        formula_id = s_formula_id or t_formula_id
+        by_task[(task_id, ledger_id)].append((pk, person_id, formula_id))
+        formula_ids.add(formula_id)
+        if v != ov:
+            changed.add(pk)
+    formula_ids.discard(None)
+    formulas = Formula.objects.in_bulk(formula_ids)
+
+    through = Score.dependencies.through
+    dep_maps = {}
+    count = 0
+    for (task_id, ledger_id), score_list in sorted(by_task.items()):
+        pk_list = [pk for pk, person_id, formula_id in score_list]
+        with transaction.atomic():
+            if not try_ledger_lock(ledger_id):
+                # another worker has this ledger; try again later.
+                continue
+            edges = []
+            for pk, person_id, formula_id in score_list:
+                if formula_id is None:
+                    # no formula means no dependencies
+                    continue
+                key = (formula_id, ledger_id)
+                if key not in dep_maps:
+                    dep_maps[key] = _score_dependency_map(
+                        formulas[formula_id], ledger_id, verbosity=verbosity
+                    )
+                edges.extend(
+                    through(from_score_id=pk, to_score_id=dep_pk)
+                    for dep_pk in dep_maps[key].get(person_id, [])
+                )
+            through.objects.filter(from_score_id__in=pk_list).delete()
+            through.objects.bulk_create(edges, batch_size=BULK_CREATE_BATCH_SIZE)
+            Score.objects.filter(pk__in=pk_list).update(dependencies_resolved=True)
+            # as ``Score.save()`` would have done, for the scores resolved:
+            dirty_reverse_deps([pk for pk in pk_list if pk in changed])
+        if verbosity > 2:
+            print(
+                "task {0}: {1} scores; {2} dependencies".format(
+                    task_id, len(pk_list), len(edges)
+                )
+            )
+        count += len(pk_list)
+    return count
+
+
 ###############################################################
 
 
@@ -115,7 +238,11 @@ def update_queryset(queryset, verbosity=0):
     Set the dependencies for a queryset of either Tasks or Scores.
     Applies some sanity to the incoming queryset, just in case it's necessary.
     """
-    for obj in queryset.filter(formula__isnull=False).select_related("rule").iterator():
+    if queryset.model == Score:
+        return resolve_scores(queryset, verbosity=verbosity)
+    for obj in (
+        queryset.filter(formula__isnull=False).select_related("formula").iterator()
+    ):
         update_instance(obj, verbosity=verbosity)
 
 
@@ -0,0 +1,137 @@
+"""
+Set-based dirty propagation.
+
+When a score changes, everything that depends on it (directly or
+indirectly) must be flagged for recalculation.  Rather than walking the
+``Score.dependencies`` through table one score at a time, the reverse
+dependencies are collected either with a single recursive CTE
+(PostgreSQL), or by expanding a frontier one DAG level at a time
+(one query per level; any database).  The flagging itself is a single
+``UPDATE``.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from django.db import connection
+
+from ...models import Score
+from ...querysets import ScoreQuerySet
+from . import pending
+
+###############################################################
+
+RDEPS_CTE_SQL = """
+WITH RECURSIVE rdeps(id) AS (
+    SELECT {from_col} FROM {through} WHERE {to_col} = ANY(%s)
+  UNION
+    SELECT t.{from_col} FROM {through} t JOIN rdeps r ON t.{to_col} = r.id
+)
+"""
+
+###############################################################
+
+
+def _through_info():
+    through = Score.dependencies.through
+    qn = connection.ops.quote_name
+    return {
+        "through": qn(through._meta.db_table),
+        "from_col": qn(through._meta.get_field("from_score").column),
+        "to_col": qn(through._meta.get_field("to_score").column),
+        "score": qn(Score._meta.db_table),
+        "pk": qn(Score._meta.pk.column),
+    }
+
+
+###############################################################
+
+
+def reverse_dependency_ids_cte(score_ids):
+    """
+    Collect the ids of all scores depending on ``score_ids`` with a
+    single recursive query.  PostgreSQL only.
+    """
+    score_ids = list(score_ids)
+    if not score_ids:
+        return set()
+    sql = RDEPS_CTE_SQL.format(**_through_info()) + "SELECT id FROM rdeps"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [score_ids])
+        return set(row[0] for row in cursor.fetchall())
+
+
+###############################################################
+
+
+def reverse_dependency_ids_frontier(score_ids):
+    """
+    Collect the ids of all scores depending on ``score_ids``, one
+    query per level of the dependency DAG.
+    """
+    through = Score.dependencies.through
+    result = set()
+    frontier = set(score_ids)
+    while frontier:
+        frontier = (
+            set(
+                through.objects.filter(to_score_id__in=frontier).values_list(
+                    "from_score_id", flat=True
+                )
+            )
+            - result
+        )
+        result.update(frontier)
+    return result
+
+
+###############################################################
+
+
+def reverse_dependency_ids(score_ids):
+    """
+    Collect the ids of all scores depending on ``score_ids``, using the
+    best method available for the database.
+    """
+    if connection.vendor == "postgresql":
+        return reverse_dependency_ids_cte(score_ids)
+    return reverse_dependency_ids_frontier(score_ids)
+
+
+###############################################################
+
+
+def dirty_reverse_deps(score_ids):
+    """
+    Flag everything that depends on ``score_ids`` for recalculation.
+    Returns the number of scores flagged.
+    """
+    score_ids = list(score_ids)
+    if not score_ids:
+        return 0
+    if pending.is_enabled():
+        # the ids are needed for the work queue.
+        rdeps = reverse_dependency_ids(score_ids)
+        pending.enqueue(rdeps, "calc")
+        return Score.objects.filter(pk__in=rdeps).update(
+            old_value=ScoreQuerySet.CALC_SENTINEL
+        )
+    if connection.vendor == "postgresql":
+        info = _through_info()
+        sql = (
+            RDEPS_CTE_SQL.format(**info)
+            + "UPDATE {score} SET old_value = %s WHERE {pk} IN (SELECT id FROM rdeps)".format(
+                **info
+            )
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [score_ids, ScoreQuerySet.CALC_SENTINEL])
+            return cursor.rowcount
+    rdeps = reverse_dependency_ids_frontier(score_ids)
+    if not rdeps:
+        return 0
+    return Score.objects.filter(pk__in=rdeps).update(
+        old_value=ScoreQuerySet.CALC_SENTINEL
+    )
+
+
+###############################################################
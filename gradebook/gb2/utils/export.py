@@ -1,11 +1,16 @@
 from __future__ import print_function, unicode_literals
 
-from gradebook.models import Score, Task
+import csv
+
+from .matrix import ScoreMatrix
 
 # Gradebook CSV export:
 
+# Spreadsheet programs use this to detect UTF-8 CSV files.
+CSV_BOM = "\ufeff"
+
 
-def score_data(
+def score_rows(
     viewport,
     good_standing=True,
     task_label=None,
@@ -14,7 +19,9 @@ def score_data(
     streg_post_fields=None,
 ):
     """
-    Returns a data array for use in dumping to a spreadsheet.
+    Generates the rows of a spreadsheet (the first row is the header).
+    Scores are fetched in a single query, when the first student row
+    is needed.
     """
 
     def _safe_student_number(r):
@@ -43,23 +50,40 @@ def score_data(
         st_role_list = st_role_list.active()
 
     if task_list is None:
-        task_list = viewport.tasks.active()
-    data = [[f[0] for f in streg_pre_fields]]
+        task_list = viewport.tasks.active().select_related("category")
+    task_list = list(task_list)
+    header = [f[0] for f in streg_pre_fields]
     for task in task_list:
-        data[0].append("{}".format(task_label(task)))
-    data[0] += [f[0] for f in streg_post_fields]
+        header.append("{}".format(task_label(task)))
+    header += [f[0] for f in streg_post_fields]
+    yield header
 
+    st_role_list = list(st_role_list)
+    matrix = ScoreMatrix(task_list, [r.person_id for r in st_role_list])
     for st_role in st_role_list:
         row = ["{}".format(f[1](st_role)) for f in streg_pre_fields]
-        for task in task_list:
-            try:
-                score = Score.objects.get(person_id=st_role.person_id, task=task)
-            except Score.DoesNotExist:
-                value = "<error>"
-            else:
-                value = score.value
-            row.append(value)
+        for cell in matrix.row(st_role.person_id):
+            row.append("<error>" if cell is None else cell[0])
         row += ["{}".format(f[1](st_role)) for f in streg_post_fields]
-        data.append(row)
+        yield row
+
+
+class _Echo(object):
+    """
+    A file-like object for ``csv.writer()``, which just returns
+    what is written.
+    """
+
+    def write(self, value):
+        return value
+
 
-    return data
+def csv_stream(rows):
+    """
+    Generates the UTF-8 encoded lines of a CSV file, for use with
+    ``StreamingHttpResponse``.
+    """
+    writer = csv.writer(_Echo())
+    yield CSV_BOM.encode("utf-8")
+    for row in rows:
+        yield writer.writerow(row).encode("utf-8")
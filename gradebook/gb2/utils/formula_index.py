@@ -0,0 +1,87 @@
+"""
+The formula dependency reverse index.
+
+``FormulaDependency`` rows record the ``("c", category slug)`` and
+``("t", task slug)`` dependencies of each formula.  Since dependencies
+are by slug, the index does not depend on the ledger (or on which tasks
+use the formula); "what goes stale when this category changes" in a
+ledger is a join of the index with that ledger's scores or tasks.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from django.db import transaction
+
+from ...models import Formula, FormulaDependency
+from ..formulalib import formula_registry
+
+###############################################################
+
+
+def _rows(formula):
+    """
+    The dependencies of the formula; ``None`` if these cannot be
+    determined (e.g., an unregistered type or invalid arguments).
+    """
+    try:
+        dependencies = formula_registry.get_dependencies(formula)
+        return set((kind, slug) for kind, slug in dependencies)
+    except Exception:
+        return None
+
+
+###############################################################
+
+
+def index_formula(formula):
+    """
+    (Re)index the dependencies of a (saved) formula.  An invalid
+    formula is indexed with no dependencies; returns ``False`` in that
+    case.
+    """
+    rows = _rows(formula)
+    with transaction.atomic():
+        FormulaDependency.objects.filter(formula_id=formula.pk).delete()
+        FormulaDependency.objects.bulk_create(
+            [
+                FormulaDependency(formula_id=formula.pk, kind=kind, slug=slug)
+                for kind, slug in sorted(rows or ())
+            ]
+        )
+    return rows is not None
+
+
+###############################################################
+
+
+def rebuild_index(verbosity=0):
+    """
+    Reindex every formula.
+    """
+    n = 0
+    for formula in Formula.objects.all().iterator():
+        if not index_formula(formula) and verbosity > 0:
+            print("could not index formula #{0}: {1}".format(formula.pk, formula))
+        n += 1
+    if verbosity > 1:
+        print("indexed {0} formulas".format(n))
+    return n
+
+
+###############################################################
+
+
+def dependent_formulas(kind, slug_list):
+    """
+    Returns ``{slug: set(formula ids)}`` for the formulas which depend
+    on any of the given category (``kind="c"``) or task (``kind="t"``)
+    slugs.
+    """
+    result = {}
+    qs = FormulaDependency.objects.filter(kind=kind, slug__in=list(slug_list))
+    for slug, formula_id in qs.values_list("slug", "formula_id"):
+        result.setdefault(slug, set()).add(formula_id)
+    return result
+
+
+###############################################################
@@ -0,0 +1,169 @@
+"""
+An in-memory map of the active i>clicker registrations (from the
+students app), for matching responses and rescoring.
+
+Each process keeps the map of ``person_id -> i>clicker ids`` (and the
+reverse); it is reloaded when its version, kept in the Django cache, is
+bumped (by the i>clicker registration signals), or when it is older
+than the ``iclicker:map-timeout`` setting.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from ... import conf
+
+###############################################################
+
+VERSION_KEY = "gradebook:iclickers:version"
+
+# (version, load time, by person, by i>clicker id)
+_loaded = None
+
+###############################################################
+
+
+def _initial_version():
+    # if the version is evicted from the cache, it must not restart at a
+    #   number which was already used.
+    return int(time.time() * 1000)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def changed():
+    """
+    Call whenever i>clicker registrations are saved or deleted.
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # not (or no longer) in the cache.
+        cache.add(VERSION_KEY, _initial_version(), None)
+
+
+###############################################################
+
+
+def registration_queryset():
+    """
+    The active i>clicker registrations.
+    """
+    from students.models import IClicker
+
+    return IClicker._default_manager.active()
+
+
+def person_field():
+    """
+    The registration lookup for the person id.
+    """
+    from students.models import Student
+
+    return Student.iclicker_set.field.name + "__person"
+
+
+def _load():
+    by_person = defaultdict(set)
+    by_iclicker = defaultdict(set)
+    for person_id, iclicker_id in registration_queryset().values_list(
+        person_field(), "iclicker_id"
+    ):
+        by_person[person_id].add(iclicker_id)
+        by_iclicker[iclicker_id].add(person_id)
+    return dict(by_person), dict(by_iclicker)
+
+
+def _maps():
+    """
+    Returns the ``(by person, by i>clicker id)`` maps, or ``None`` if
+    these are disabled.
+    """
+    global _loaded
+    timeout = conf.get("iclicker:map-timeout")
+    if not timeout:
+        return None
+    version = get_version()
+    now = time.time()
+    loaded = _loaded
+    if loaded is None or loaded[0] != version or now - loaded[1] > timeout:
+        loaded = (version, now) + _load()
+        _loaded = loaded
+    return loaded[2], loaded[3]
+
+
+def clear():
+    """
+    Drop this process's map.
+    """
+    global _loaded
+    _loaded = None
+
+
+###############################################################
+
+
+def iclicker_ids_for_person(person_id):
+    """
+    The set of active i>clicker ids registered by this person.
+    """
+    maps = _maps()
+    if maps is None:
+        return set(
+            registration_queryset()
+            .filter(**{person_field(): person_id})
+            .values_list("iclicker_id", flat=True)
+        )
+    return maps[0].get(person_id, set())
+
+
+def iclicker_ids_for_persons(person_ids):
+    """
+    ``{person_id: set of active i>clicker ids}`` for these people (those
+    without registrations are omitted).
+    """
+    maps = _maps()
+    if maps is None:
+        result = defaultdict(set)
+        for person_id, iclicker_id in (
+            registration_queryset()
+            .filter(**{person_field() + "__in": list(person_ids)})
+            .values_list(person_field(), "iclicker_id")
+        ):
+            result[person_id].add(iclicker_id)
+        return dict(result)
+    return dict(
+        (person_id, maps[0][person_id])
+        for person_id in person_ids
+        if person_id in maps[0]
+    )
+
+
+def persons_for_iclickers(iclicker_ids):
+    """
+    The set of people with active registrations for these i>clicker ids.
+    """
+    maps = _maps()
+    if maps is None:
+        return set(
+            registration_queryset()
+            .filter(iclicker_id__in=list(iclicker_ids))
+            .values_list(person_field(), flat=True)
+        )
+    result = set()
+    for iclicker_id in iclicker_ids:
+        result.update(maps[1].get(iclicker_id, ()))
+    return result
+
+
+###############################################################
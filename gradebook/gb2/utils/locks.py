@@ -0,0 +1,44 @@
+"""
+Per-ledger locks, so that several calculate daemon workers can share
+the work: a ledger is only ever calculated by one worker at a time,
+which keeps cascades consistent, while other ledgers are unaffected.
+
+These are PostgreSQL transaction level advisory locks; with other
+databases, there is only ever one worker and the locks always succeed.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from django.db import connection
+
+###############################################################
+
+# The first key of the (two key) advisory locks, i.e., "gb".
+LEDGER_LOCK_CLASS = 0x6762
+
+###############################################################
+
+
+def is_available():
+    return connection.vendor == "postgresql"
+
+
+###############################################################
+
+
+def try_ledger_lock(ledger_id):
+    """
+    Attempt to lock the ledger, without waiting.  This must be called
+    inside a transaction; the lock is held until the transaction ends.
+    Returns ``True`` if the lock was obtained.
+    """
+    if not is_available():
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_try_advisory_xact_lock(%s, %s)", [LEDGER_LOCK_CLASS, ledger_id]
+        )
+        return cursor.fetchone()[0]
+
+
+###############################################################
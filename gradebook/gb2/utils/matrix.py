@@ -0,0 +1,77 @@
+"""
+Dense person x task score matrices, loaded with a single query.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from ...models import Score
+
+###############################################################
+
+
+class ScoreMatrix(object):
+    """
+    The scores for a list of tasks and people, as a dense matrix:
+    ``matrix.row(person_id)`` is the list of cells in task order.
+    Cells are tuples of ``fields`` (or, with ``objects=True``, the
+    ``Score`` instances), and ``None`` where there is no score.
+
+    All the scores are fetched in one (streamed) query.
+    """
+
+    def __init__(self, task_list, person_ids, fields=("value",), objects=False):
+        self.task_list = list(task_list)
+        self.person_ids = list(person_ids)
+        self.fields = tuple(fields)
+        self.objects = objects
+        self._task_index = dict(
+            (getattr(t, "pk", t), i) for i, t in enumerate(self.task_list)
+        )
+        self._rows = None
+
+    def get_queryset(self):
+        return Score.objects.filter(
+            task_id__in=list(self._task_index), person_id__in=self.person_ids
+        )
+
+    def load(self, queryset=None):
+        """
+        Fetch the scores; ``queryset`` may be used to restrict them
+        further (or to add ``select_related()``, with ``objects=True``).
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        else:
+            queryset = queryset.filter(
+                task_id__in=list(self._task_index), person_id__in=self.person_ids
+            )
+        width = len(self.task_list)
+        self._rows = dict((person_id, [None] * width) for person_id in self.person_ids)
+        if self.objects:
+            for score in queryset.iterator():
+                self._rows[score.person_id][self._task_index[score.task_id]] = score
+        else:
+            queryset = queryset.select_related(None).order_by()
+            fields = ("person_id", "task_id") + self.fields
+            for row in queryset.values_list(*fields).iterator():
+                self._rows[row[0]][self._task_index[row[1]]] = row[2:]
+        return self
+
+    def row(self, person_id):
+        if self._rows is None:
+            self.load()
+        return self._rows[person_id]
+
+    def get(self, person_id, task, default=None):
+        cell = self.row(person_id)[self._task_index[getattr(task, "pk", task)]]
+        return default if cell is None else cell
+
+    def __iter__(self):
+        """
+        ``(person_id, row)`` pairs, in order.
+        """
+        for person_id in self.person_ids:
+            yield person_id, self.row(person_id)
+
+
+###############################################################
@@ -0,0 +1,119 @@
+"""
+Wake-up notifications for the calculate daemon.
+
+Whenever scores are flagged for calculation or dependency resolution,
+a notification is sent on the ``calculate:notify-channel`` channel.
+The daemon (``gb2.score.calculate --listen``) blocks on this channel
+instead of polling the score table every few seconds.
+
+This uses PostgreSQL ``LISTEN``/``NOTIFY``; with other databases (or
+when the channel is ``None``) nothing is sent, and the daemon falls
+back to polling.
+Note that PostgreSQL only delivers notifications when the transaction
+commits, and collapses duplicates within a transaction.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import select
+
+from django.db import connection, transaction
+
+from ... import conf
+
+###############################################################
+
+
+def get_channel():
+    """
+    Returns the notification channel, or ``None`` if notifications
+    are not available.
+    """
+    if connection.vendor != "postgresql":
+        return None
+    return conf.get("calculate:notify-channel")
+
+
+###############################################################
+
+
+def notify_calculate(payload=""):
+    """
+    Wake up the calculate daemon.
+    """
+    channel = get_channel()
+    if channel is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [channel, payload])
+
+
+def _notify_committed():
+    notify_calculate()
+
+
+def notify_on_commit():
+    """
+    Wake up the calculate daemon once the current transaction commits
+    (right away outside of a transaction).  However many times this is
+    called within a transaction, only one notification is sent.
+    """
+    if get_channel() is None:
+        return
+    for sids, func in connection.run_on_commit:
+        if func is _notify_committed:
+            return
+    transaction.on_commit(_notify_committed)
+
+
+###############################################################
+
+
+class CalculateListener(object):
+    """
+    Blocks until a notification arrives (or a timeout expires).
+    The ``LISTEN`` is reissued whenever the database connection changes,
+    e.g., after the daemon recovers from an error.
+    """
+
+    def __init__(self):
+        self.channel = get_channel()
+        self._listening = None
+
+    def is_available(self):
+        return self.channel is not None
+
+    def listen(self):
+        connection.ensure_connection()
+        if self._listening is connection.connection:
+            return
+        sql = "LISTEN {0}".format(connection.ops.quote_name(self.channel))
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        self._listening = connection.connection
+
+    def drain(self):
+        """
+        Returns the list of pending notification payloads.
+        """
+        pg_conn = connection.connection
+        pg_conn.poll()
+        payloads = [n.payload for n in pg_conn.notifies]
+        del pg_conn.notifies[:]
+        return payloads
+
+    def wait(self, timeout):
+        """
+        Returns the list of notification payloads received (empty on
+        timeout).
+        """
+        self.listen()
+        payloads = self.drain()
+        if payloads:
+            return payloads
+        if select.select([connection.connection], [], [], timeout) == ([], [], []):
+            return []
+        return self.drain()
+
+
+###############################################################
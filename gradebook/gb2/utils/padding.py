@@ -0,0 +1,184 @@
+"""
+Score padding: there should be a score for every student in every task
+of their (current) viewports.
+
+Padding is normally done as roles and viewport tasks change (see
+``gradebook.signals``); ``pad_all()`` is the full reconciliation, used
+by ``gb2.score.pad`` as an occasional fallback for changes which bypass
+signals (e.g., ``bulk_create()`` or ``update()``).
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from django.utils.timezone import now
+
+from ... import conf
+from ...models import LedgerViewport, Role, Score, Task
+
+###############################################################
+
+BULK_CREATE_BATCH_SIZE = 1000
+PERSON_CHUNK_SIZE = 500
+
+###############################################################
+
+
+def is_enabled():
+    return conf.get("pad:on-change")
+
+
+###############################################################
+
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+###############################################################
+
+
+def _existing(task_ids, person_ids):
+    """
+    The set of ``(task_id, person_id)`` pairs which have scores.
+    """
+    return set(
+        Score.objects.filter(task_id__in=task_ids, person_id__in=person_ids)
+        .select_related(None)
+        .values_list("task_id", "person_id")
+    )
+
+
+def _post_create(pair_set):
+    """
+    Bulk creation does not send ``post_save``; flag the category
+    dependencies of the new ``(task_id, person_id)`` scores, once per
+    ledger.
+    """
+    from .category_deps import category_deps_bulk
+
+    task_ids = set(task_id for task_id, person_id in pair_set)
+    task_info = dict(
+        (pk, (ledger_id, category_id))
+        for pk, ledger_id, category_id in Task.objects.filter(
+            pk__in=task_ids
+        ).values_list("pk", "ledger_id", "category_id")
+    )
+    by_ledger = {}
+    for task_id, person_id in pair_set:
+        ledger_id, category_id = task_info[task_id]
+        by_ledger.setdefault(ledger_id, set()).add((person_id, category_id))
+    for ledger_id, category_pairs in sorted(by_ledger.items()):
+        category_deps_bulk(ledger_id, sorted(category_pairs))
+
+
+###############################################################
+
+
+def pad_pairs(task_ids, person_ids):
+    """
+    Create any missing scores for the given tasks and people.
+    Returns the number of scores created.
+    """
+    task_ids = sorted(set(task_ids))
+    person_ids = sorted(set(p for p in person_ids if p is not None))
+    if not task_ids or not person_ids:
+        return 0
+    n = 0
+    for chunk in _chunks(person_ids, PERSON_CHUNK_SIZE):
+        existing = _existing(task_ids, chunk)
+        create_list = [
+            Score(task_id=t, person_id=p, value="", old_value="~")
+            for t in task_ids
+            for p in chunk
+            if (t, p) not in existing
+        ]
+        if not create_list:
+            continue
+        # a concurrent pad may have created some of these already; these
+        #   are skipped by the insert, so find what is actually new.  (A
+        #   score may then be flagged by both pads, which is harmless.)
+        Score.objects.bulk_create(
+            create_list, batch_size=BULK_CREATE_BATCH_SIZE, ignore_conflicts=True
+        )
+        created = _existing(task_ids, chunk) - existing
+        if created:
+            _post_create(created)
+        n += len(created)
+    return n
+
+
+###############################################################
+
+
+def student_roles(upcoming=False):
+    """
+    Active student roles in active viewports; current ones, or with
+    ``upcoming`` also those which have not yet started.
+    """
+    dt = now()
+    qs = Role.objects.active().filter(
+        role="st",
+        person__active=True,
+        viewport__active=True,
+        viewport__ledger__active=True,
+        dtend__gt=dt,
+    )
+    if not upcoming:
+        qs = qs.filter(dtstart__lte=dt)
+    return qs
+
+
+###############################################################
+
+
+def pad_role(role):
+    """
+    Pad the scores for a (new or changed) role.
+    """
+    if not student_roles(upcoming=True).filter(pk=role.pk).exists():
+        return 0
+    task_ids = role.viewport.tasks.values_list("pk", flat=True)
+    return pad_pairs(task_ids, [role.person_id])
+
+
+###############################################################
+
+
+def pad_viewport(viewport_id, task_ids=None, upcoming=True):
+    """
+    Pad the scores for a viewport, optionally only for some tasks.
+    """
+    if task_ids is None:
+        task_ids = LedgerViewport.tasks.through.objects.filter(
+            ledgerviewport_id=viewport_id
+        ).values_list("task_id", flat=True)
+    person_ids = (
+        student_roles(upcoming=upcoming)
+        .filter(viewport_id=viewport_id)
+        .values_list("person_id", flat=True)
+    )
+    return pad_pairs(list(task_ids), list(person_ids))
+
+
+###############################################################
+
+
+def pad_all():
+    """
+    The full reconciliation: pad every current viewport, one at a
+    time, so only one viewport's worth of pairs is ever in memory.
+    """
+    viewport_ids = list(
+        student_roles()
+        .order_by("viewport_id")
+        .values_list("viewport_id", flat=True)
+        .distinct()
+    )
+    n = 0
+    for viewport_id in viewport_ids:
+        n += pad_viewport(viewport_id, upcoming=False)
+    return n
+
+
+###############################################################
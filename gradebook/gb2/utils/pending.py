@@ -0,0 +1,92 @@
+"""
+The pending score work queue.
+
+When the ``calculate:pending-queue`` setting is ``True``, scores flagged
+for calculation or dependency resolution are also recorded in the
+(small) ``ScorePending`` table.  The calculate daemon
+(``gb2.score.calculate --queue``) then claims batches of these with
+``SELECT ... FOR UPDATE SKIP LOCKED``, rather than scanning the score
+table.
+
+A score may be queued more than once; claimed rows are deleted only
+once they have been processed (in the same transaction), so a score
+queued again while it is being processed is not lost.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from django.db import transaction
+
+from ... import conf
+from ...models import Score, ScorePending
+
+###############################################################
+
+BULK_CREATE_BATCH_SIZE = 1000
+DEFAULT_CLAIM_SIZE = 1000
+
+###############################################################
+
+
+def is_enabled():
+    return conf.get("calculate:pending-queue")
+
+
+###############################################################
+
+
+def enqueue(score_ids, reason):
+    """
+    Queue the given scores for the calculate daemon.
+    """
+    if not is_enabled():
+        return 0
+    obj_list = [ScorePending(score_id=pk, reason=reason) for pk in score_ids]
+    ScorePending.objects.bulk_create(obj_list, batch_size=BULK_CREATE_BATCH_SIZE)
+    return len(obj_list)
+
+
+###############################################################
+
+
+# Once processed, scores matching these are still pending; e.g., their
+#   ledger was locked by another worker.
+STILL_PENDING = {
+    "calc": lambda qs: qs.changed(),
+    "deps": lambda qs: qs.stale_dependencies(),
+}
+
+###############################################################
+
+
+def process_pending(reason, func, limit=DEFAULT_CLAIM_SIZE):
+    """
+    Claim batches of queued scores, and call ``func(score_queryset)``
+    for each batch.  Queue entries are removed when ``func`` returns,
+    unless the score is still pending.
+    Returns the number of scores processed.
+    """
+    count = 0
+    while True:
+        with transaction.atomic():
+            claimed = list(
+                ScorePending.objects.select_for_update(skip_locked=True)
+                .filter(reason=reason)
+                .order_by("enqueued", "pk")
+                .values_list("pk", "score_id")[:limit]
+            )
+            if not claimed:
+                return count
+            score_ids = set(score_id for pk, score_id in claimed)
+            score_qs = Score.objects.filter(pk__in=score_ids).active()
+            func(score_qs)
+            keep = set(STILL_PENDING[reason](score_qs).values_list("pk", flat=True))
+            done = [pk for pk, score_id in claimed if score_id not in keep]
+            ScorePending.objects.filter(pk__in=done).delete()
+        if not done:
+            # no progress; leave the rest for later.
+            return count
+        count += len(score_ids) - len(keep)
+
+
+###############################################################
@@ -0,0 +1,135 @@
+"""
+Bulk matching of uploaded responses to scores.
+
+This gives the same results as calculating each score with the
+i>clicker (``icli``), i>clicker scores (``iclm``) or bubblesheet
+(``bbl``) formulas, but the responses of a whole upload are matched to
+the students in a handful of queries: by i>clicker id for ``icli`` (see
+``iclickers.py``), and by student number for the others.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ...models import Response, Score
+from ..formulalib.bubblesheet import BubbleSheetCalc
+from ..formulalib.iclicker import IClickerCalc, IClickerMoodleCalc
+from . import taskstats
+from .dirty import dirty_reverse_deps
+from .iclickers import iclicker_ids_for_persons
+from .notify import notify_calculate
+
+###############################################################
+
+BULK_UPDATE_BATCH_SIZE = 500
+# formula types matched by i>clicker id:
+ICLICKER_TYPES = [IClickerCalc.type_code]
+# formula types matched by student number:
+STUDENT_NUMBER_TYPES = [IClickerMoodleCalc.type_code, BubbleSheetCalc.type_code]
+
+###############################################################
+
+
+def _response_map(task_ids):
+    """
+    ``{(task_id, student_id): [(response pk, score), ...]}``
+    for the active responses of these tasks.
+    """
+    result = defaultdict(list)
+    for pk, task_id, student_id, score in (
+        Response.objects.active()
+        .filter(task_id__in=task_ids)
+        .values_list("pk", "task_id", "student_id", "score")
+    ):
+        result[(task_id, student_id)].append((pk, score))
+    return result
+
+
+###############################################################
+
+
+def match_responses(score_qs, verbosity=0):
+    """
+    Match responses for the scores of ``score_qs`` which have response
+    formulas (scored i>clicker scores are left alone, as with
+    ``update_for_recalc()``).  The scores are saved as calculated, and
+    anything depending on a changed score is flagged for recalculation.
+    Returns the list of primary keys of the scores matched.
+    """
+    types = ICLICKER_TYPES + STUDENT_NUMBER_TYPES
+    score_list = list(
+        score_qs.exclude_scored_iclickers()
+        .filter(
+            Q(formula__type__in=types)
+            | Q(formula__isnull=True, task__formula__type__in=types)
+        )
+        .select_related(None)
+        .only("pk", "task_id", "person_id", "value", "old_value")
+        .annotate(
+            formula_type=Coalesce("formula__type", "task__formula__type"),
+            student_number=F("person__student__student_number"),
+        )
+    )
+    if not score_list:
+        return []
+
+    task_ids = set(score.task_id for score in score_list)
+    responses = _response_map(task_ids)
+    iclicker_map = iclicker_ids_for_persons(
+        set(
+            score.person_id
+            for score in score_list
+            if score.formula_type in ICLICKER_TYPES
+        )
+    )
+
+    scored = set()
+    updated = []
+    for score in score_list:
+        # responses must work through a student record...
+        matches = []
+        if score.formula_type in ICLICKER_TYPES:
+            for iclicker_id in iclicker_map.get(score.person_id, ()):
+                matches.extend(responses.get((score.task_id, iclicker_id), []))
+        elif score.student_number is not None:
+            key = (score.task_id, "{}".format(score.student_number))
+            matches = responses.get(key, [])
+        if len(matches) == 1:
+            response_pk, value = matches[0]
+            scored.add(response_pk)
+        else:
+            value = ""
+        value = "{}".format(value)
+        if value != score.value:
+            updated.append(score.pk)
+        score.value = value
+        score.old_value = value
+
+    with transaction.atomic():
+        Score.objects.bulk_update(
+            score_list, ["value", "old_value"], batch_size=BULK_UPDATE_BATCH_SIZE
+        )
+        if scored:
+            Response.objects.filter(pk__in=scored).update(
+                scored=True, modified=timezone.now()
+            )
+        if updated:
+            taskstats.task_changed(task_ids)
+            if dirty_reverse_deps(updated):
+                notify_calculate()
+    if verbosity > 0:
+        print(
+            "{0} scores matched; {1} updated; {2} responses scored".format(
+                len(score_list), len(updated), len(scored)
+            )
+        )
+    return [score.pk for score in score_list]
+
+
+###############################################################
@@ -0,0 +1,40 @@
+"""
+In-memory formula symbol tables.
+
+``FormulaCalc.build_symbol_table`` runs a query per dependency slug, for
+every score calculated.  The batch calculation (``batch.py``) loads the
+dependency values of a whole ledger at once instead, and hands each
+calculation a ``SymbolTable`` built from these.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from ..formulalib.formulacalc import SymbolTable
+
+###############################################################
+
+
+def build_symbol_table(dep_primitives, dep_rows):
+    """
+    The in-memory equivalent of ``FormulaCalc.build_symbol_table``.
+    ``dep_primitives`` are the (model type code, slug) pairs of the formula;
+    ``dep_rows`` are (task slug, category slug, triplet) tuples for the
+    active dependencies of the score, in the default score ordering.
+    """
+    results = SymbolTable()
+    for cls, slug in dep_primitives:
+        if cls == "c":
+            entry = [triplet for t_slug, c_slug, triplet in dep_rows if c_slug == slug]
+            results.add(slug, "c", entry)
+        elif cls == "t":
+            entry = [triplet for t_slug, c_slug, triplet in dep_rows if t_slug == slug]
+            if entry:
+                results.add(slug, "t", entry[0])
+            else:
+                results.add(slug, "t", "not found")
+        else:
+            raise RuntimeError("Invalid dependency class {0}".format(cls))
+    return results
+
+
+###############################################################
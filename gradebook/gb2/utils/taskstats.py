@@ -0,0 +1,113 @@
+"""
+Cached per-task statistics for the score list views.
+
+The summary (count, sum, sum of squares, min, max, histogram bins) of
+a task's scores, as seen from a viewport, is kept in the Django cache;
+the statistics and the histogram are derived from it.  Entries are
+keyed by the task and viewport *versions*: saving or calculating a
+score bumps its task's version and changing a role bumps its
+viewport's version, so stale entries are simply never read again (and
+expire).
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+import time
+
+from django.core.cache import cache
+
+from ... import conf
+from ...utils import statistics
+
+###############################################################
+
+KEY_PREFIX = "gradebook:taskstats"
+
+###############################################################
+
+
+def _version_key(kind, pk):
+    return "{0}:version:{1}:{2}".format(KEY_PREFIX, kind, pk)
+
+
+def _initial_version():
+    # if a version is evicted from the cache, it must not restart at a
+    #   number which was already used.
+    return int(time.time() * 1000)
+
+
+def get_version(kind, pk):
+    key = _version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(kind, pk_list):
+    for pk in set(pk_list):
+        key = _version_key(kind, pk)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # not (or no longer) in the cache.
+            cache.add(key, _initial_version(), None)
+
+
+###############################################################
+
+
+def task_changed(task_ids):
+    """
+    Call whenever scores in these tasks are saved.
+    """
+    bump_version("task", task_ids)
+
+
+def viewport_changed(viewport_ids):
+    """
+    Call whenever the (student) roles of these viewports change.
+    """
+    bump_version("viewport", viewport_ids)
+
+
+###############################################################
+
+
+def _entry_key(task_id, viewport_id):
+    return "{0}:stats:{1}.{2}:{3}.{4}".format(
+        KEY_PREFIX,
+        task_id,
+        get_version("task", task_id),
+        viewport_id,
+        get_version("viewport", viewport_id),
+    )
+
+
+def task_statistics(task, viewport, score_qs, size="400,300"):
+    """
+    Returns the ``(statistics, histogram)`` pair for the scores of
+    ``task`` in ``viewport`` (``score_qs``), as ``statistics.statistics()``
+    and ``statistics.histogram_img()`` would.
+    """
+    timeout = conf.get("statistics:cache-timeout")
+    if not timeout:
+        return (
+            statistics.statistics(score_qs),
+            statistics.histogram_img(score_qs, size=size),
+        )
+    key = _entry_key(task.pk, viewport.pk)
+    entry = cache.get(key)
+    if entry is None:
+        # ``None`` (no numeric scores) is cached as well.
+        entry = {"summary": statistics.summarize(score_qs)}
+        cache.set(key, entry, timeout)
+    summary = entry["summary"]
+    return (
+        statistics.statistics_from_summary(summary),
+        statistics.histogram_from_summary(summary, size=size),
+    )
+
+
+###############################################################
@@ -33,6 +33,8 @@ in the dependency DAG.
 """
 from __future__ import print_function, unicode_literals
 
+from collections import defaultdict, deque
+
 ###############################################################
 
 
@@ -102,3 +104,140 @@ def topsort(obj, graph=None):
 
 
 ###############################################################
+
+
+class LedgerGraph(object):
+    """
+    The score dependency DAG of an entire ledger, held in memory.
+
+    ``edges`` are ``(from_id, to_id)`` pairs as stored in the
+    ``Score.dependencies`` through table, i.e., score ``from_id``
+    depends on score ``to_id``.
+    ``inactive`` is a collection of score ids which are not followed
+    when walking to dependent scores (cf. ``reverse_dependencies.active()``).
+
+    Unlike ``topsort()``, nothing here touches the database once the
+    graph is built.
+    """
+
+    def __init__(self, edges, inactive=None):
+        self.dependencies = defaultdict(list)
+        self.reverse_dependencies = defaultdict(list)
+        self.inactive = set(inactive or [])
+        for from_id, to_id in edges:
+            self.dependencies[from_id].append(to_id)
+            self.reverse_dependencies[to_id].append(from_id)
+
+    @classmethod
+    def for_scores(cls, score_ids):
+        """
+        Build the graph of the scores which depend, directly or
+        indirectly, on ``score_ids``; these are collected as for dirty
+        propagation (see ``dirty.py``), so the rest of the ledger is
+        never loaded.
+        """
+        from ...models import Score
+        from .dirty import reverse_dependency_ids
+
+        score_ids = set(score_ids)
+        rdeps = reverse_dependency_ids(score_ids)
+        if not rdeps:
+            return cls([])
+        through = Score.dependencies.through
+        edge_qs = through.objects.filter(
+            from_score_id__in=rdeps, to_score_id__in=rdeps | score_ids
+        ).values_list("from_score_id", "to_score_id", "from_score__active")
+        edges = []
+        inactive = set()
+        for from_id, to_id, from_active in edge_qs.iterator():
+            edges.append((from_id, to_id))
+            if not from_active:
+                inactive.add(from_id)
+        return cls(edges, inactive=inactive)
+
+    @property
+    def nodes(self):
+        return set(self.dependencies).union(self.reverse_dependencies)
+
+    def reverse_reachable(self, start, include_start=True):
+        """
+        Return the set of (active) scores which depend, directly or
+        indirectly, on any of the ``start`` score ids.
+        """
+        result = set()
+        stack = list(start)
+        while stack:
+            pk = stack.pop()
+            for m in self.reverse_dependencies[pk]:
+                if m not in result and m not in self.inactive:
+                    result.add(m)
+                    stack.append(m)
+        if include_start:
+            result.update(start)
+        return result
+
+    def order(self, nodes=None):
+        """
+        Kahn's algorithm, restricted to ``nodes`` (default: every node).
+        Each score id appears after everything it depends on.
+        Raises ``ValueError`` if the (sub)graph has a cycle.
+        """
+        if nodes is None:
+            nodes = self.nodes
+        indegree = dict.fromkeys(nodes, 0)
+        for pk in indegree:
+            for m in self.reverse_dependencies[pk]:
+                if m in indegree:
+                    indegree[m] += 1
+        queue = deque(sorted(pk for pk, n in indegree.items() if n == 0))
+        result = []
+        while queue:
+            pk = queue.popleft()
+            result.append(pk)
+            for m in self.reverse_dependencies[pk]:
+                if m in indegree:
+                    indegree[m] -= 1
+                    if indegree[m] == 0:
+                        queue.append(m)
+        if len(result) != len(indegree):
+            raise ValueError(
+                "Not a directed acyclic graph; cycle: {0}".format(
+                    self.find_cycle(nodes)
+                )
+            )
+        return result
+
+    def find_cycle(self, nodes=None):
+        """
+        Return a list of score ids forming a dependency cycle within
+        ``nodes`` (default: every node), or ``None`` if there is none.
+        """
+        if nodes is None:
+            nodes = self.nodes
+        nodes = set(nodes)
+        WHITE, GREY, BLACK = 0, 1, 2
+        colour = defaultdict(int)
+        for root in sorted(nodes):
+            if colour[root] != WHITE:
+                continue
+            colour[root] = GREY
+            path = [root]
+            stack = [iter(self.dependencies[root])]
+            while stack:
+                for m in stack[-1]:
+                    if m not in nodes:
+                        continue
+                    if colour[m] == GREY:
+                        return path[path.index(m) :]
+                    if colour[m] == WHITE:
+                        colour[m] = GREY
+                        path.append(m)
+                        stack.append(iter(self.dependencies[m]))
+                        break
+                else:
+                    colour[path.pop()] = BLACK
+                    stack.pop()
+        return None
+
+
+###############################################################
@@ -0,0 +1,51 @@
+"""
+The cached roles of the gradebook views.
+
+With the ``views:role-cache-timeout`` setting, the available and
+selected roles of a person are cached for each viewport they view (see
+``SelectedViewportMixin``); these are the person's own roles only.
+When any of a person's roles change, all of their entries are dropped:
+the available roles are those of every viewport.
+"""
+###############################################################
+from __future__ import print_function, unicode_literals
+
+from django.core.cache import cache
+
+from ... import conf
+from ...models import LedgerViewport, Role
+
+###############################################################
+
+
+def is_enabled():
+    return bool(conf.get("views:role-cache-timeout"))
+
+
+def cache_key(person_id, viewport_slug):
+    return "gradebook:view-roles:{0}:{1}".format(person_id, viewport_slug)
+
+
+###############################################################
+
+
+def forget(person_id, viewport_ids=()):
+    """
+    Drop the cached roles of this person, for the viewports of all of
+    their roles and for ``viewport_ids`` (e.g., of a deleted role).
+    """
+    if not is_enabled() or person_id is None:
+        return
+    viewport_ids = set(viewport_ids)
+    viewport_ids.update(
+        Role._base_manager.filter(person_id=person_id).values_list(
+            "viewport_id", flat=True
+        )
+    )
+    slug_list = LedgerViewport._base_manager.filter(pk__in=viewport_ids).values_list(
+        "slug", flat=True
+    )
+    cache.delete_many([cache_key(person_id, slug) for slug in slug_list])
+
+
+###############################################################
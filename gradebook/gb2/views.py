@@ -5,14 +5,15 @@ Gradebook 2 views.
 from __future__ import print_function, unicode_literals
 
 import base64
-import mimetypes
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.core.files.storage import FileSystemStorage
+from django.db import transaction
 from django.db.models import Q
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils.decorators import method_decorator
@@ -30,6 +31,8 @@ from .. import conf
 from ..models import Formula, Ledger, LedgerViewport, Role, Score, Task
 from ..utils import marks_upload, start_end, statistics
 from . import forms
+from .utils import export, taskstats, viewroles
+from .utils.matrix import ScoreMatrix
 
 #######################################################################
 
@@ -183,22 +186,46 @@ class SelectedViewportMixin(AvailableRoleMixin):
 
     role_restrictions = ["superuser", "course coordinator", "instructor"]
 
+    def _role_cache_key(self):
+        return viewroles.cache_key(self.person.pk, self.kwargs["viewport"])
+
     def _set_requesting_role(self):
         """
-        set the class attributes:
+        set the class attributes (once per request):
             ``self._selected_role``: The actual role object loading this view.
+        With the ``views:role-cache-timeout`` setting, the available and
+        selected roles are also cached for each person and viewport (see
+        ``gb2/utils/viewroles.py``).  The effective role is not: an
+        instructor's promotion depends on the roles of other people.
+        ``self.available_role_list`` is a list, whether cached or not.
         """
+        if hasattr(self, "_selected_role"):
+            return
+        timeout = conf.get("views:role-cache-timeout")
+        self._set_person()
+        if timeout and self.person is not None:
+            cached = cache.get(self._role_cache_key())
+            if cached is not None:
+                self.available_role_list, self._selected_role = cached
+                self._current_role = None
+                return
         self._set_available_roles()
-        if not hasattr(self, "selected_role"):
-            self._selected_role = None
-            self._current_role = None
-            L = [
-                r
-                for r in self.available_role_list
-                if r.viewport.slug == self.kwargs["viewport"]
-            ]
-            if len(L) == 1:
-                self._selected_role = L[0]
+        self.available_role_list = list(self.available_role_list)
+        self._selected_role = None
+        self._current_role = None
+        L = [
+            r
+            for r in self.available_role_list
+            if r.viewport.slug == self.kwargs["viewport"]
+        ]
+        if len(L) == 1:
+            self._selected_role = L[0]
+        if timeout and self.person is not None:
+            cache.set(
+                self._role_cache_key(),
+                (self.available_role_list, self._selected_role),
+                timeout,
+            )
 
     def get_viewport(self):
         """
@@ -210,11 +237,13 @@ class SelectedViewportMixin(AvailableRoleMixin):
     def get_all_viewports_queryset(self):
         """
         A queryset for all viewports in the ledger this viewport
-        belongs in.
+        belongs in.  (This is the same queryset object for the whole
+        request, so once evaluated, its results are reused.)
         """
-        viewport = self.get_viewport()
-        qs = viewport.ledger.ledgerviewport_set.active()
-        return qs
+        if not hasattr(self, "_all_viewports_queryset"):
+            viewport = self.get_viewport()
+            self._all_viewports_queryset = viewport.ledger.ledgerviewport_set.active()
+        return self._all_viewports_queryset
 
     def get_requesting_role(self):
         """
@@ -242,7 +271,8 @@ class SelectedViewportMixin(AvailableRoleMixin):
                 dtend=role.dtend,
             )
             viewport_qs = self.get_all_viewports_queryset()
-            count = viewport_qs.count()
+            # (evaluated, so that later count()s are free.)
+            count = len(viewport_qs)
             if count == 1:
                 # single viewport promotion
                 role.role = "co"
@@ -308,19 +338,31 @@ class SelectedViewportMixin(AvailableRoleMixin):
         viewport = self.get_viewport()
         return viewport.tasks.active().select_related("category")
 
+    def get_student_person_ids(self, active_only=False):
+        """
+        The set of people with student roles (computed once per request).
+        """
+        if not hasattr(self, "_student_person_ids"):
+            self._student_person_ids = {}
+        if active_only not in self._student_person_ids:
+            student_role_qs = self.get_student_role_queryset()
+            if active_only:
+                student_role_qs = student_role_qs.active()
+            self._student_person_ids[active_only] = set(
+                student_role_qs.values_list("person_id", flat=True)
+            )
+        return self._student_person_ids[active_only]
+
     def get_score_queryset(self, active_only=False):
         """
         Get all scores for this viewport
         """
-        student_role_qs = self.get_student_role_queryset()
-        if active_only:
-            student_role_qs = student_role_qs.active()
         task_qs = self.get_task_queryset()
         qs = (
             Score.objects.active()
             .filter(
                 task__in=task_qs,
-                person__in=student_role_qs.values_list("person_id", flat=True),
+                person__in=self.get_student_person_ids(active_only=active_only),
             )
             .select_related(
                 "person",
@@ -647,10 +689,18 @@ class ScoreMixin(SelectedViewportMixin):
         context["NS_INDICATOR"] = Score.NS_INDICATOR
         context["OVERRIDE_INDICATOR"] = Score.OVERRIDE_INDICATOR
 
-        stats = statistics.statistics(self.get_queryset())
+        score_list = getattr(self, "object_list", None)
+        if score_list is None:
+            score_list = self.get_queryset()
+        if task_slug is not None:
+            stats, histogram = taskstats.task_statistics(
+                context["task_object"], self.get_viewport(), score_list, "500,350"
+            )
+        else:
+            stats = statistics.statistics(score_list)
+            histogram = statistics.histogram_img(score_list, size="500,350")
         if stats:
             context["statistics"] = stats
-        histogram = statistics.histogram_img(self.get_queryset(), size="500,350")
         if histogram is not None:
             data, mimetype = histogram
             context["histogram"] = {
@@ -695,6 +745,11 @@ class ScoreEditList(ScoreFormSetMixin, ModelFormSetView):
     url_name = "gradebook2-score-editlist"
     url_params = ("viewport", "task")
 
+    def formset_valid(self, formset):
+        # a single transaction, so the calculate daemon is woken once.
+        with transaction.atomic():
+            return super(ScoreEditList, self).formset_valid(formset)
+
     def get_success_url(self):
         return reverse(
             ScoreList.url_name,
@@ -782,6 +837,15 @@ class StudentScoreList(StudentScoreMixin, ListView):
     url_name = "gradebook2-student-score-list"
     url_params = ("viewport",)
 
+    def get_queryset(self, *args, **kwargs):
+        """
+        This student's row of the score matrix.
+        """
+        score_qs = super(StudentScoreList, self).get_queryset(*args, **kwargs)
+        person_id = self.student_role.person_id
+        matrix = ScoreMatrix(self.get_task_queryset(), [person_id], objects=True)
+        return [s for s in matrix.load(score_qs).row(person_id) if s is not None]
+
 
 ################################################################
 
@@ -871,11 +935,11 @@ class BulkResponseFormMixin(object):
         """
         If the form is valid, create responses
         """
-        results = form.bulk_create(self.get_viewport(), self.get_effective_role())
+        count = form.bulk_create(self.get_viewport(), self.get_effective_role())
         messages.success(
             self.request,
             _("Saved %(count)d %(desc)s responses")
-            % {"count": len(results), "desc": self.response_description},
+            % {"count": count, "desc": self.response_description},
             fail_silently=True,
         )
         return HttpResponseRedirect(self.get_success_url())
@@ -1005,52 +1069,6 @@ class SessionFileMixin(object):
         session_key = base + key
         return self.request.session.pop(session_key, None)
 
-    def set_session_result(self, format, data):
-        base = self._get_session_basekey()
-        self.request.session[base + "filename"] = (
-            self.get_viewport().slug + "." + format
-        )
-        if isinstance(data, bytes):
-            data = base64.b64encode(data).decode("utf-8")
-            self.request.session[base + "b64"] = True
-        self.request.session[base + "data"] = data
-
-    def _pop_session_result(self):
-        base = self._get_session_basekey()
-        filename = self.request.session.pop(base + "filename", None)
-        data = self.request.session.pop(base + "data", None)
-        if self.request.session.pop(base + "b64", False):
-            data = base64.b64decode(data)
-        return filename, data
-
-    def has_session_result(self):
-        base = self._get_session_basekey()
-        return (
-            base + "filename" in self.request.session
-            and base + "data" in self.request.session
-        )
-
-    def data_response(self, disposition_type=None):
-        """
-        ``disposition_type`` may be ``attachment``; which forces
-        the view to download a file.
-        """
-        if not self.has_session_result():
-            raise Http404("already downloaded")
-        filename, data = self._pop_session_result()
-        contenttype, encoding = mimetypes.guess_type(filename)
-        if contenttype == "text/csv" and isinstance(data, bytes):
-            # for dealing with the UTF-8 BOM
-            contenttype = "application/octect-stream"
-        response = HttpResponse(content_type=contenttype)
-        content_disposition = ""
-        if disposition_type is not None:
-            content_disposition += disposition_type + "; "
-        content_disposition += "filename=" + filename
-        response["Content-Disposition"] = content_disposition
-        response.content = data
-        return response
-
 
 ################################################################
 
@@ -1088,22 +1106,16 @@ class SpreadsheetExportFormView(SelectedViewportMixin, SessionFileMixin, FormVie
 
     def form_valid(self, form):
         """
-        If the form is valid, create responses
+        If the form is valid, remember the options; the spreadsheet
+        itself is generated (and streamed) by the download view.
         """
         self.set_session_keyval("form-initial", form.cleaned_data)
-        format, data = form.response_data()
-        filename = self.get_viewport().slug + "." + format
-        self.set_session_result(format, data)
+        self.set_session_keyval("export", form.cleaned_data)
         return super().form_valid(form)
-        contenttype, encoding = mimetypes.guess_type(filename)
-        response = HttpResponse(content_type=contenttype)
-        response["Content-Disposition"] = "attachment; filename=" + filename
-        response.write(data)
-        return response
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        context["allow_download"] = self.has_session_result()
+        context["allow_download"] = self.get_session_keyval("export") is not None
         return context
 
 
@@ -1117,7 +1129,20 @@ class SpreadsheetDownloadView(SelectedViewportMixin, SessionFileMixin, View):
     session_prefix = SpreadsheetExportFormView.url_name
 
     def get(self, *args, **kwargs):
-        return self.data_response(disposition_type="attachment")
+        options = self.pop_session_keyval("export")
+        if options is None:
+            raise Http404("already downloaded")
+        form = forms.SpreadsheetExportForm(data=options, viewport=self.get_viewport())
+        if not form.is_valid():
+            raise Http404("invalid export options")
+        # response_rows() always gives csv.
+        format, rows = form.response_rows()
+        filename = self.get_viewport().slug + "." + format
+        response = StreamingHttpResponse(
+            export.csv_stream(rows), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = "attachment; filename=" + filename
+        return response
 
 
 ################################################################
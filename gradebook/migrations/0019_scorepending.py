@@ -0,0 +1,77 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# PostgreSQL only: partial indexes for the calculate daemon scans
+#   (ScoreQuerySet.changed() and ScoreQuerySet.stale_dependencies()).
+PARTIAL_INDEXES = [
+    (
+        "gradebook_score_changed_idx",
+        "CREATE INDEX gradebook_score_changed_idx ON gradebook_score (id) "
+        "WHERE value <> old_value",
+    ),
+    (
+        "gradebook_score_stale_deps_idx",
+        "CREATE INDEX gradebook_score_stale_deps_idx ON gradebook_score (id) "
+        "WHERE NOT dependencies_resolved",
+    ),
+]
+
+
+def create_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, sql in PARTIAL_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, sql in PARTIAL_INDEXES:
+        schema_editor.execute("DROP INDEX IF EXISTS {0}".format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("gradebook", "0018_auto_20171208_1114")]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScorePending",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("calc", "Calculation"),
+                            ("deps", "Dependency resolution"),
+                        ],
+                        max_length=4,
+                    ),
+                ),
+                ("enqueued", models.DateTimeField(auto_now_add=True)),
+                (
+                    "score",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="gradebook.Score",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "pending scores",
+                "ordering": ("enqueued",),
+                "index_together": {("reason", "enqueued")},
+            },
+        ),
+        migrations.RunPython(create_partial_indexes, drop_partial_indexes),
+    ]
@@ -0,0 +1,75 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    from gradebook.gb2.formulalib import formula_registry
+
+    Formula = apps.get_model("gradebook", "Formula")
+    FormulaDependency = apps.get_model("gradebook", "FormulaDependency")
+    obj_list = []
+    skipped = []
+    for formula in Formula.objects.all().iterator():
+        try:
+            rows = set(formula_registry.get_dependencies(formula))
+        except Exception:
+            # e.g., an unregistered type or bad arguments; do not
+            #   abort the migration for it.
+            skipped.append(formula.pk)
+            continue
+        obj_list.extend(
+            FormulaDependency(formula_id=formula.pk, kind=kind, slug=slug)
+            for kind, slug in sorted(rows)
+        )
+    formula_registry.clear_cache()
+    FormulaDependency.objects.bulk_create(obj_list, batch_size=1000)
+    if skipped:
+        print(
+            "\n  {0} formulas could not be indexed (ids: {1}); once they are "
+            "fixed, run gb2.formula_reindex".format(
+                len(skipped), ", ".join("{}".format(pk) for pk in skipped)
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("gradebook", "0019_scorepending")]
+
+    operations = [
+        migrations.CreateModel(
+            name="FormulaDependency",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("c", "Category"), ("t", "Task")], max_length=1
+                    ),
+                ),
+                ("slug", models.SlugField(db_index=False, max_length=64)),
+                (
+                    "formula",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dependency_index",
+                        to="gradebook.Formula",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "formula dependencies",
+                "unique_together": {("formula", "kind", "slug")},
+                "index_together": {("kind", "slug")},
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
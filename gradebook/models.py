@@ -431,6 +431,15 @@ class Score(GradebookBaseModel):
         """
         result = super(Score, self).save(*args, **kwargs)
         update_fields = kwargs.get("update_fields", None)
+        # what was just written, before the flags below are changed:
+        needs_calc = self.value != self.old_value and (
+            update_fields is None
+            or "value" in update_fields
+            or "old_value" in update_fields
+        )
+        needs_deps = not self.dependencies_resolved and (
+            update_fields is None or "dependencies_resolved" in update_fields
+        )
         if update_fields is None:
             # note: no change in kwargs
             update_fields = ["formula", "full_marks"]
@@ -442,6 +451,15 @@ class Score(GradebookBaseModel):
                 self.old_value = "{}".format(self) + Score.CALC_SENTINEL
         if self.value != self.old_value:
             self.dirty_reverse_deps()
+        if needs_calc or needs_deps:
+            from .gb2.utils.notify import notify_on_commit
+            from .gb2.utils.pending import enqueue
+
+            if needs_calc:
+                enqueue([self.pk], "calc")
+            if needs_deps:
+                enqueue([self.pk], "deps")
+            notify_on_commit()
         return result
 
     def dirty_reverse_deps(self):
@@ -449,21 +467,11 @@ class Score(GradebookBaseModel):
         This score has been changed -- any reverse dependencies on this
         score will also change!
 
-        Note that this is recursive.
+        Note that this is transitive.
         """
+        from .gb2.utils.dirty import dirty_reverse_deps
 
-        def _rdep_pks(score):
-            result = []
-            result.extend(score.reverse_dependencies.values_list("pk", flat=True))
-            for s in score.reverse_dependencies.all():
-                result.extend(_rdep_pks(s))
-            return result
-
-        rdeps_list = _rdep_pks(self)
-        if rdeps_list:
-            Score.objects.filter(pk__in=rdeps_list).update(
-                old_value=ScoreQuerySet.CALC_SENTINEL
-            )
+        return dirty_reverse_deps([self.pk])
 
     dirty_reverse_deps.alters_data = True
     dirty_reverse_deps.do_not_call_in_templates = True
@@ -561,14 +569,18 @@ class Score(GradebookBaseModel):
             self.save(update_fields=["value", "old_value"])
 
         if updated and cascade:
-            from .gb2.utils.topsort import topsort
+            from .gb2.utils.topsort import LedgerGraph
 
-            cascade_list = topsort(self)
+            graph = LedgerGraph.for_scores([self.pk])
+            cascade_list = graph.order(graph.reverse_reachable([self.pk]))
             top = cascade_list.pop(0)  # the current score -- already changed/calculated
             assert (
-                top == self
+                top == self.pk
             ), "TopSort returned something totally unexpected -- first element is not reference object"
-            for score in cascade_list:
+            score_map = Score.objects.select_related(
+                "task", "formula", "task__formula"
+            ).in_bulk(cascade_list)
+            for score in (score_map[pk] for pk in cascade_list):
                 if verbosity > 2:
                     print(
                         'Next score is cascaded from change in score "{self.task.slug}#{self.pk}"'.format(
@@ -589,6 +601,35 @@ class Score(GradebookBaseModel):
 ############################################################################
 
 
+@python_2_unicode_compatible
+class ScorePending(models.Model):
+    """
+    A compact work queue for the calculate daemon; see
+    ``gb2/utils/pending.py``.  This is only populated when the
+    ``calculate:pending-queue`` setting is ``True``.
+    """
+
+    REASON_CHOICES = (
+        ("calc", _("Calculation")),
+        ("deps", _("Dependency resolution")),
+    )
+
+    score = models.ForeignKey("gradebook.Score", on_delete=models.CASCADE)
+    reason = models.CharField(max_length=4, choices=REASON_CHOICES)
+    enqueued = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("enqueued",)
+        index_together = (("reason", "enqueued"),)
+        verbose_name_plural = _("pending scores")
+
+    def __str__(self):
+        return "{0} #{1}".format(self.reason, self.score_id)
+
+
+############################################################################
+
+
 @python_2_unicode_compatible
 class Formula(GradebookBaseModel):
     """
@@ -656,3 +697,33 @@ class Formula(GradebookBaseModel):
 
 
 ############################################################################
+
+
+@python_2_unicode_compatible
+class FormulaDependency(models.Model):
+    """
+    The reverse index of formula dependencies: which formulas depend
+    on a given category or task slug.  This is maintained when formulas
+    are saved; see ``gb2/utils/formula_index.py``.
+    """
+
+    KIND_CHOICES = (("c", _("Category")), ("t", _("Task")))
+
+    formula = models.ForeignKey(
+        "gradebook.Formula",
+        on_delete=models.CASCADE,
+        related_name="dependency_index",
+    )
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    slug = models.SlugField(max_length=64, db_index=False)
+
+    class Meta:
+        unique_together = (("formula", "kind", "slug"),)
+        index_together = (("kind", "slug"),)
+        verbose_name_plural = _("formula dependencies")
+
+    def __str__(self):
+        return "{0} {1}:{2}".format(self.formula_id, self.kind, self.slug)
+
+
+############################################################################
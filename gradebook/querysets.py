@@ -9,6 +9,7 @@ from functools import reduce
 
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
+from django.db.models.functions import Upper
 
 from . import conf
 
@@ -148,7 +149,32 @@ class ScoreQuerySet(BaseCustomQuerySet):
         """
         Update so that these scores will have their dependencies re-done.
         """
-        return self.update(dependencies_resolved=False)
+        return self._flag(self, "deps", dependencies_resolved=False)
+
+    def _flag(self, queryset, reason, **updates):
+        """
+        Flag the scores of ``queryset`` for the calculate daemon with
+        ``updates``: queue them (with the pending queue enabled) and
+        wake it up.
+        The scores to queue are determined before the update, which may
+        change which scores the queryset matches.
+        """
+        from .gb2.utils import pending
+        from .gb2.utils.notify import notify_calculate
+
+        if not pending.is_enabled():
+            count = queryset.update(**updates)
+        else:
+            pk_list = list(queryset.order_by().values_list("pk", flat=True))
+            if not pk_list:
+                return 0
+            count = self.model._base_manager.filter(pk__in=pk_list).update(
+                **updates
+            )
+            pending.enqueue(pk_list, reason)
+        if count:
+            notify_calculate()
+        return count
 
     def has_formula(self):
         """
@@ -184,35 +210,55 @@ class ScoreQuerySet(BaseCustomQuerySet):
             | models.Q(task__formula__in=formula_iter)
         )
 
-    def calculate(self, verbosity=0):
+    def calculate(self, verbosity=0, batch=True):
         """
         Do the calculations of this queryset.
+        By default, each affected ledger is evaluated in a single pass
+        (see ``gb2/utils/batch.py``); ``batch=False`` calculates (and
+        cascades) one score at a time.
         """
+        if batch:
+            from .gb2.utils.batch import calculate_queryset
+
+            return calculate_queryset(self, verbosity=verbosity)
         qs = self.select_related("task", "formula", "task__formula")
         for obj in qs.iterator():
             result = obj.calculate(verbosity=verbosity)
 
-    def resolve_dependencies(self, verbosity=0):
+    def resolve_dependencies(self, verbosity=0, batch=True):
         """
         Do the dependencies resolution for this queryset.
+        By default, this is done a task at a time
+        (see ``gb2/utils/depgraph.py``); ``batch=False`` resolves
+        one score at a time.
         """
+        if batch:
+            from .gb2.utils.depgraph import resolve_scores
+
+            return resolve_scores(self, verbosity=verbosity)
         qs = self.select_related("task", "formula", "task__formula")
         for obj in qs.iterator():
             result = obj.resolve_dependencies(verbosity=verbosity)
 
+    def exclude_scored_iclickers(self):
+        """
+        Excludes i>clicker scores which have already been matched.
+        """
+        # Note: exclude scored iclickers from recalcuation as matching
+        #   these is dependant on the registrations *at the time*.
+        #   Once matched, student iclicker scores should never be
+        #   automatically removed.
+        return self.exclude(
+            ~models.Q(value=""),
+            models.Q(formula__type="icli") | models.Q(task__formula__type="icli"),
+        )
+
     def update_for_recalc(self, exclude_iclickers=True):
         """
         Flags this queryset for recalcuation.
         """
         if exclude_iclickers:
-            # Note: exclude scored iclickers from recalcuation as matching
-            #   these is dependant on the registrations *at the time*.
-            #   Once matched, student iclicker scores should never be
-            #   automatically removed.
-            qs = self.exclude(
-                ~models.Q(value=""),
-                models.Q(formula__type="icli") | models.Q(task__formula__type="icli"),
-            )
+            qs = self.exclude_scored_iclickers()
         else:
             qs = self
 
@@ -221,13 +267,21 @@ class ScoreQuerySet(BaseCustomQuerySet):
         #   should probably get drawn and quartered.
         # I'd *like* to do value+'~', but F expressions cannot
         #   do string concatenation in a database agnostic way.
-        return qs.update(old_value=ScoreQuerySet.CALC_SENTINEL)
+        return self._flag(qs, "calc", old_value=ScoreQuerySet.CALC_SENTINEL)
+
+    def dirty_reverse_deps(self):
+        """
+        Flags everything that depends on this queryset for recalculation.
+        """
+        from .gb2.utils.dirty import dirty_reverse_deps
+
+        return dirty_reverse_deps(self.values_list("pk", flat=True))
 
     def update_for_redep(self):
         """
         Flags this queryset for resetting each score's dependencies.
         """
-        return self.update(dependencies_resolved=False)
+        return self.set_stale_dependencies()
 
 
 #######################################################################
@@ -309,11 +363,113 @@ class RoleQuerySet(BaseCustomQuerySet):
         """
         query_list = conf.get("role_from_id")(id_value, hint)
         if query_list is None:
-            return qs.none()
+            return self.none()
         or_queries = [models.Q(**query) for query in query_list]
         qs = self.filter(reduce(operator.or_, or_queries))
         return qs.distinct()
 
+    def persons_from_ids(self, id_list, hint=None):
+        """
+        ``from_id`` for many ids at once: returns a dictionary mapping
+        each id to the set of matching person ids (possibly empty).
+        The ``role_from_id`` lookups are grouped, so there is one query
+        per distinct lookup (exact and case insensitive exact lookups
+        only; any others are done one id at a time).
+        """
+        result = dict((id_value, set()) for id_value in id_list)
+        # lookup -> {lookup value: [id, ...]}
+        by_lookup = {}
+        slow_ids = []
+        for id_value in result:
+            query_list = conf.get("role_from_id")(id_value, hint)
+            if query_list is None:
+                continue
+            if any(len(query) != 1 for query in query_list):
+                slow_ids.append(id_value)
+                continue
+            for query in query_list:
+                (lookup, value), = query.items()
+                field, sep, kind = lookup.rpartition("__")
+                if kind == "iexact":
+                    if value is None:
+                        # as with ``filter(field__iexact=None)``.
+                        lookup = field
+                    else:
+                        lookup = field + "__iexact"
+                        value = "{}".format(value).upper()
+                elif kind == "exact":
+                    lookup = field
+                elif kind in models.Field.get_lookups():
+                    slow_ids.append(id_value)
+                    break
+                if value is not None:
+                    # the database may return, e.g., a string for an int.
+                    value = "{}".format(value)
+                by_lookup.setdefault(lookup, {}).setdefault(value, []).append(
+                    id_value
+                )
+
+        for lookup, value_map in by_lookup.items():
+            if lookup.endswith("__iexact"):
+                field = lookup[: -len("__iexact")]
+                qs = self.annotate(_id_match=Upper(field)).filter(
+                    _id_match__in=list(value_map)
+                )
+                match_field = "_id_match"
+            else:
+                values = [v for v in value_map if v is not None]
+                q = models.Q(**{lookup + "__in": values})
+                if None in value_map:
+                    # as with ``filter(field=None)``.
+                    q |= models.Q(**{lookup + "__isnull": True})
+                qs = self.filter(q)
+                match_field = lookup
+            for value, person_id in qs.values_list(match_field, "person_id"):
+                if value is not None:
+                    value = "{}".format(value)
+                for id_value in value_map.get(value, []):
+                    result[id_value].add(person_id)
+
+        for id_value in slow_ids:
+            result[id_value] = set(
+                self.from_id(id_value, hint).values_list("person_id", flat=True)
+            )
+        return result
+
+    def resolve_ids(self, id_list, hint=None, viewport_qs=None):
+        """
+        Resolve many ids to people at once: returns a
+        ``(person_map, ambiguous)`` pair.  ``person_map`` maps each id
+        which matches exactly one person to that ``Person``, and any
+        other id to ``None``; ``ambiguous`` is the set of ids matching
+        more than one person.
+        This is the same answer as ``from_id()`` gives for each id,
+        using at most one query per kind of lookup (and one for the
+        people).
+        """
+        qs = self
+        if viewport_qs is not None:
+            qs = qs.filter(viewport__in=viewport_qs)
+        matches = qs.persons_from_ids(id_list, hint=hint)
+        person_ids = set(
+            next(iter(person_set))
+            for person_set in matches.values()
+            if len(person_set) == 1
+        )
+        # as ``role.person`` would fetch them.
+        Person = self.model._meta.get_field("person").related_model
+        person_map = Person._base_manager.in_bulk(person_ids)
+        result = {}
+        ambiguous = set()
+        for id_value, person_set in matches.items():
+            if len(person_set) == 1:
+                result[id_value] = person_map[next(iter(person_set))]
+            else:
+                result[id_value] = None
+                if person_set:
+                    ambiguous.add(id_value)
+        return result, ambiguous
+
 
 #######################################################################
 
@@ -25,10 +25,12 @@ def score_post_save(sender, instance, created, raw, *args, **kwargs):
         return
     if not created:
         return
-    from gradebook.gb2.utils.category_deps import category_deps
+    from gradebook.gb2.utils.category_deps import category_deps_bulk
 
-    # Caution: bulk_created, as used in cli.score.pad; does not make this happen.
-    category_deps(instance.task.ledger, instance.person, instance.task.category.slug)
+    # Caution: bulk_create() does not make this happen; see gb2.utils.padding.
+    category_deps_bulk(
+        instance.task.ledger_id, [(instance.person_id, instance.task.category_id)]
+    )
 
 
 ################################################################
@@ -43,9 +45,100 @@ def score_post_delete(sender, instance, *args, **kwargs):
     
     Remember -- this instance is no longer in the database.
     """
-    from gradebook.gb2.utils.category_deps import category_deps
+    from gradebook.gb2.utils.category_deps import category_deps_bulk
 
-    category_deps(instance.task.ledger, instance.person, instance.task.category.slug)
+    category_deps_bulk(
+        instance.task.ledger_id, [(instance.person_id, instance.task.category_id)]
+    )
+
+
+################################################################
+
+
+def formula_post_save(sender, instance, *args, **kwargs):
+    """
+    Drop any cached calculation objects for this formula.
+    """
+    from gradebook.gb2.formulalib import formula_registry
+
+    formula_registry.invalidate(instance.pk)
+
+
+################################################################
+
+
+def formula_index_post_save(sender, instance, raw, *args, **kwargs):
+    """
+    Keep the formula dependency reverse index up to date.
+    """
+    if raw:
+        return
+    from gradebook.gb2.utils.formula_index import index_formula
+
+    index_formula(instance)
+
+
+################################################################
+
+
+def role_post_save(sender, instance, created, raw, *args, **kwargs):
+    """
+    Pad scores for new (or changed) student roles.
+    """
+    if raw:
+        return
+    from gradebook.gb2.utils import padding
+
+    if padding.is_enabled() and instance.role == "st":
+        padding.pad_role(instance)
+
+
+################################################################
+
+
+def viewport_tasks_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Pad scores when tasks are added to a viewport
+    (``viewport.tasks.add(...)`` or ``task.ledgerviewport_set.add(...)``).
+    """
+    if action != "post_add" or not pk_set:
+        return
+    from gradebook.gb2.utils import padding
+
+    if not padding.is_enabled():
+        return
+    if reverse:
+        # instance is a task; pk_set are viewports.
+        for viewport_id in pk_set:
+            padding.pad_viewport(viewport_id, task_ids=[instance.pk])
+    else:
+        padding.pad_viewport(instance.pk, task_ids=pk_set)
+
+
+################################################################
+
+
+def score_stats_changed(sender, instance, *args, **kwargs):
+    """
+    Cached task statistics are out of date.
+    """
+    from gradebook.gb2.utils import taskstats
+
+    taskstats.task_changed([instance.task_id])
+
+
+################################################################
+
+
+def role_stats_changed(sender, instance, *args, **kwargs):
+    """
+    Cached task statistics for the viewport (and the person's cached
+    view roles) are out of date.
+    """
+    from gradebook.gb2.utils import taskstats, viewroles
+
+    taskstats.viewport_changed([instance.viewport_id])
+    viewroles.forget(instance.person_id, [instance.viewport_id])
 
 
 ################################################################
@@ -56,10 +149,21 @@ def ready():
     Register signals etc.
     """
     from django.db import models
-    from ..models import Score
+    from ..models import Formula, LedgerViewport, Role, Score
 
     models.signals.post_delete.connect(score_post_delete, sender=Score)
     models.signals.post_save.connect(score_post_save, sender=Score)
+    models.signals.post_save.connect(formula_post_save, sender=Formula)
+    models.signals.post_delete.connect(formula_post_save, sender=Formula)
+    models.signals.post_save.connect(formula_index_post_save, sender=Formula)
+    models.signals.post_save.connect(role_post_save, sender=Role)
+    models.signals.post_save.connect(score_stats_changed, sender=Score)
+    models.signals.post_delete.connect(score_stats_changed, sender=Score)
+    models.signals.post_save.connect(role_stats_changed, sender=Role)
+    models.signals.post_delete.connect(role_stats_changed, sender=Role)
+    models.signals.m2m_changed.connect(
+        viewport_tasks_changed, sender=LedgerViewport.tasks.through
+    )
 
 
 ################################################################
@@ -91,7 +195,7 @@ def students_ready():
     Register signals for integration with the students app.
     """
     from django.db import models
-    from students.models import Student_Registration
+    from students.models import IClicker, Student_Registration
     from . import students_app
 
     models.signals.pre_delete.connect(
@@ -100,6 +204,8 @@ def students_ready():
     models.signals.post_save.connect(
         students_app.studentregistration_post_save, sender=Student_Registration
     )
+    models.signals.post_save.connect(students_app.iclicker_changed, sender=IClicker)
+    models.signals.post_delete.connect(students_app.iclicker_changed, sender=IClicker)
 
 
 ################################################################
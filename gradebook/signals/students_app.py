@@ -36,3 +36,21 @@ def studentregistration_pre_delete(sender, instance, *args, **kwargs):
 
 
 ###############################################################
+
+
+# when an i>clicker registration is saved/deleted, reload the
+#   i>clicker id map.
+def iclicker_changed(sender, instance, *args, **kwargs):
+    """
+    The i>clicker id map is out of date.
+    """
+    from django.db import transaction
+
+    from ..gb2.utils import iclickers
+
+    # only once the change is visible to other processes; otherwise
+    #   these may reload the map before the commit, and keep it.
+    transaction.on_commit(iclickers.changed)
+
+
+###############################################################
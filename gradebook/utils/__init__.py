@@ -4,6 +4,7 @@
 #
 from __future__ import print_function, unicode_literals
 
+import codecs
 import datetime
 
 #############################################################################
@@ -39,3 +40,16 @@ def unslugify(value):
 
 
 #############################################################################
+
+
+def text_lines(fp, encoding="utf-8"):
+    """
+    Returns an iterator over the lines of a text or binary (e.g., an
+    uploaded) file, decoding as it goes.
+    """
+    if isinstance(fp.read(0), bytes):
+        return codecs.getreader(encoding)(fp)
+    return fp
+
+
+#############################################################################
@@ -5,11 +5,12 @@ Bubblesheet utilities
 
 from __future__ import print_function, unicode_literals
 
+import csv
 import os
 import sys
 from pprint import pprint
 
-import spreadsheet
+from . import text_lines
 
 ################################################################
 #
@@ -17,7 +18,7 @@ import spreadsheet
 #
 
 
-def record_load(fp, verbosity):
+def iter_records(fp, verbosity):
     """
     src: http://umanitoba.ca/computing/ist/teaching/exam_scoring/examscoring-output.html
     date: 2010-Apr-14
@@ -35,6 +36,8 @@ def record_load(fp, verbosity):
     177 - 192 	 16 	 Gobsrid Sourced Id
     193 - 196 	 4 	 Not used
     197 - 1156 	 960 	 Responses (1-960)
+
+    The records are read (and split) one line at a time.
     """
 
     def split_at(string, positions):
@@ -47,12 +50,22 @@ def record_load(fp, verbosity):
         return result
 
     positions = [1, 13, 25, 56, 110, 116, 170, 173, 176, 192, 196]
-    lines = fp.read().replace("\r", "\n").replace("\n\n", "\n").split("\n")
-    results = [[e.strip() for e in split_at(line, positions)] for line in lines]
-    if verbosity == 3:
-        for row in results:
-            pprint(dict(zip(record_headers(), row)))
-    return results
+    for text in text_lines(fp, "latin-1"):
+        # (either line ending.)
+        for line in text.replace("\r", "\n").split("\n"):
+            if not line:
+                continue
+            record = [e.strip() for e in split_at(line, positions)]
+            if verbosity == 3:
+                pprint(dict(zip(record_headers(), record)))
+            yield record
+
+
+def record_load(fp, verbosity):
+    """
+    The list of ``iter_records()``.
+    """
+    return list(iter_records(fp, verbosity))
 
 
 ################################################################
@@ -155,51 +168,65 @@ def parse_student_row(
 ################################################################
 
 
-def parse_file(filename, fp, verbosity, solution, check):
+def _open_records(filename, fp, verbosity):
+    """
+    Returns the lower case headers, the course info and the (remaining)
+    records of a data file.
+    """
     if filename.endswith(".csv"):
-        opt_scores = spreadsheet.sheetReader(
-            filename=filename, fileobj=fp, subargs={"encoding": "latin-1"}
-        )
-        headers = [e.lower() for e in opt_scores[0]]
-        course_info = parse_course_info(opt_scores[1][3])
-        record_start_row = 2
+        records = (row for row in csv.reader(text_lines(fp, "latin-1")) if row)
+        headers = [e.lower() for e in next(records)]
+        course_info = parse_course_info(next(records)[3])
 
     elif filename.endswith(".txt"):
-        opt_scores = record_load(fp, verbosity)
+        records = iter_records(fp, verbosity)
         headers = [e.lower() for e in record_headers()]
-        course_info = parse_course_info(opt_scores[0][3])
-        record_start_row = 1
+        course_info = parse_course_info(next(records)[3])
 
     else:
         assert False, (
             "Cannot load this data... bubblesheet data is either .csv or .txt files; not "
             + os.path.splitext(filename)[-1]
         )
+    return headers, course_info, records
+
 
+def iter_file(filename, fp, verbosity, solution, check):
+    """
+    As ``parse_file()``, but the student records are generated.
+    The file is read twice, one record at a time, so ``fp`` must be
+    seekable.
+    """
+    fp.seek(0)
+    headers, course_info, records = _open_records(filename, fp, verbosity)
     score_column_idx = headers.index("total correct responses")
     responses_idx = headers.index("responses")
     serial_number_idx = headers.index("sheet serial number")
     # full_marks = len(opt_scores[1][-1].replace('0', '').strip())
     # course_info['full_marks'] = full_marks
 
+    def student_records(records):
+        for row in records:
+            d = parse_student_row(
+                row,
+                serial_number_idx,
+                score_column_idx,
+                responses_idx,
+                solution,
+                check,
+                verbosity,
+            )
+            if d is not None and d["student_number"]:
+                yield d
+
     # two passes: 1st pass, check for duplicate student numbers
-    seen_ids = []
+    seen_ids = set()
     duplicate_ids = []
-    for row in opt_scores[record_start_row:]:
-        d = parse_student_row(
-            row,
-            serial_number_idx,
-            score_column_idx,
-            responses_idx,
-            solution,
-            check,
-            verbosity,
-        )
-        if d is not None and d["student_number"]:
-            if d["student_number"] not in seen_ids:
-                seen_ids.append(d["student_number"])
-            else:
-                duplicate_ids.append(d["student_number"])
+    for d in student_records(records):
+        if d["student_number"] not in seen_ids:
+            seen_ids.add(d["student_number"])
+        else:
+            duplicate_ids.append(d["student_number"])
 
     if duplicate_ids:
         print(
@@ -209,25 +236,19 @@ def parse_file(filename, fp, verbosity, solution, check):
         print("   ", ", ".join(duplicate_ids))
         print("!!!", "no action will be taken for these student numbers.")
 
-    results = []
-    for row in opt_scores[record_start_row:]:
-        d = parse_student_row(
-            row,
-            serial_number_idx,
-            score_column_idx,
-            responses_idx,
-            solution,
-            check,
-            verbosity,
-        )
-        if (
-            d is not None
-            and d["student_number"]
-            and d["student_number"] not in duplicate_ids
-        ):
-            results.append(d)
-
-    return course_info, results
+    def results(duplicate_ids):
+        fp.seek(0)
+        records = _open_records(filename, fp, verbosity)[2]
+        for d in student_records(records):
+            if d["student_number"] not in duplicate_ids:
+                yield d
+
+    return course_info, results(set(duplicate_ids))
+
+
+def parse_file(filename, fp, verbosity, solution, check):
+    course_info, results = iter_file(filename, fp, verbosity, solution, check)
+    return course_info, list(results)
 
 
 ################################################################
@@ -0,0 +1,98 @@
+"""
+In-process SVG histograms.
+
+This draws the same picture as the old gnuplot script: boxes centred on
+``binwidth * floor(x / binwidth)``, ``binwidth = (max - min) / 10``,
+over the x range ``[min - binwidth, max + binwidth]``.
+"""
+#######################################################################
+
+from __future__ import print_function, unicode_literals
+
+from django.utils.html import escape
+
+#######################################################################
+
+CONTENT_TYPE = "image/svg+xml"
+BOX_FILL = "#0000ff"  # gnuplot line type 3
+MARGIN_LEFT = 50
+MARGIN_RIGHT = 15
+MARGIN_TOP = 15
+MARGIN_BOTTOM = 30
+TICKS = 5
+
+#######################################################################
+
+
+def _ticks(lo, hi, n=TICKS):
+    if hi <= lo:
+        return [lo]
+    step = float(hi - lo) / n
+    return [lo + i * step for i in range(n + 1)]
+
+
+def _label(x):
+    return escape("{0:.4g}".format(x))
+
+
+#######################################################################
+
+
+def render_svg(bins, binwidth, min_, max_, size="400,300"):
+    """
+    Returns the SVG document (as bytes) for a histogram, given its
+    ``(bin start, count)`` pairs.
+    """
+    width, height = [int(n) for n in size.split(",")]
+    if not binwidth:
+        # all values are the same.
+        binwidth = 1.0
+    x_lo = min_ - binwidth
+    x_hi = max_ + binwidth
+    y_hi = max([c for start, c in bins] or [1])
+    plot_w = width - MARGIN_LEFT - MARGIN_RIGHT
+    plot_h = height - MARGIN_TOP - MARGIN_BOTTOM
+
+    def sx(x):
+        return MARGIN_LEFT + (x - x_lo) / (x_hi - x_lo) * plot_w
+
+    def sy(y):
+        return MARGIN_TOP + plot_h - float(y) / y_hi * plot_h
+
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+        'viewBox="0 0 {0} {1}" font-family="sans-serif" font-size="10">'.format(
+            width, height
+        ),
+        '<g fill="{0}" stroke="#000000" stroke-width="1">'.format(BOX_FILL),
+    ]
+    for start, count in bins:
+        left = max(sx(start - binwidth / 2.0), MARGIN_LEFT)
+        right = min(sx(start + binwidth / 2.0), MARGIN_LEFT + plot_w)
+        parts.append(
+            '<rect x="{0:.2f}" y="{1:.2f}" width="{2:.2f}" height="{3:.2f}"/>'.format(
+                left, sy(count), max(right - left, 0), sy(0) - sy(count)
+            )
+        )
+    parts.append("</g>")
+    parts.append(
+        '<rect x="{0}" y="{1}" width="{2}" height="{3}" fill="none" '
+        'stroke="#000000"/>'.format(MARGIN_LEFT, MARGIN_TOP, plot_w, plot_h)
+    )
+    for x in _ticks(x_lo, x_hi):
+        parts.append(
+            '<text x="{0:.2f}" y="{1}" text-anchor="middle">{2}</text>'.format(
+                sx(x), height - MARGIN_BOTTOM + 14, _label(x)
+            )
+        )
+    for y in _ticks(0, y_hi):
+        parts.append(
+            '<text x="{0}" y="{1:.2f}" text-anchor="end">{2}</text>'.format(
+                MARGIN_LEFT - 4, sy(y) + 3, _label(y)
+            )
+        )
+    parts.append("</svg>")
+    return "\n".join(parts).encode("utf-8")
+
+
+#######################################################################
@@ -2,7 +2,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function, unicode_literals
 
-from spreadsheet import sheetReader
+import csv
+import itertools
+
+from . import text_lines
 
 
 class ParseError(Exception):
@@ -49,15 +52,14 @@ def parse(data, debug=0):
     """
     This function parses a file object into iclicker responses.
     """
-    rows = sheetReader(
-        data.name, fileobj=data, input_format="csv", subargs={"encoding": "utf-8"}
-    )
+    rows = (row for row in csv.reader(text_lines(data, "utf-8-sig")) if row)
     try:
-        if rows[0][0] != "Scoring":
+        first_row = next(rows)
+        if first_row[0] != "Scoring":
             raise ParseError(
-                "not a valid i>clicker data file" + " :[0,0] = %r" % rows[0][0]
+                "not a valid i>clicker data file" + " :[0,0] = %r" % first_row[0]
             )
-    except IndexError:
+    except (StopIteration, IndexError):
         raise ParseError("not a valid i>clicker data file: no [0,0] element")
 
     def _header_parts(h):
@@ -88,7 +90,8 @@ def parse(data, debug=0):
 
     question_indices = None
     student_results = {}  # maps clicker ids to responses
-    for row in rows:
+    # the rows are read one at a time.
+    for row in itertools.chain([first_row], rows):
         if row[0] == "Question":
             if debug > 2:
                 print(row)
@@ -139,7 +142,7 @@ def parse(data, debug=0):
                 print("numeric_correct_answers:", numeric_correct_answers)
                 print("alpha_correct_answers:", alpha_correct_answers)
 
-        if row[0][0] == "#":  # student record
+        if row[0][:1] == "#":  # student record
             iclicker = row[0][1:]
             while len(iclicker) < 8:
                 iclicker = "0" + iclicker
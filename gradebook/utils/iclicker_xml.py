@@ -24,18 +24,69 @@ def xml_load(input_filename_or_fp):
     return root
 
 
+class _LStripReader(object):
+    """
+    Skips any leading whitespace in the file, which the XML parser
+    would reject.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.started = False
+
+    def read(self, size=-1):
+        data = self.fp.read(size)
+        while not self.started and data:
+            data = data.lstrip()
+            if data:
+                self.started = True
+            else:
+                data = self.fp.read(size)
+        return data
+
+
+def iter_polls(input_filename_or_fp):
+    """
+    Generates the poll (``<p>``) elements of an i>clicker XML file,
+    without loading the whole document: each poll is discarded once
+    the next one is read.
+    """
+    if isinstance(input_filename_or_fp, six.string_types):
+        fp = open(input_filename_or_fp, "rb")
+    else:
+        fp = input_filename_or_fp
+    root = None
+    depth = 0
+    try:
+        for event, elem in ElementTree.iterparse(
+            _LStripReader(fp), events=("start", "end")
+        ):
+            if event == "start":
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1 and elem.tag == "p":
+                yield elem
+                root.clear()
+    except ElementTree.ParseError as e:
+        raise ParseError("not a valid i>clicker XML data file: {0}".format(e))
+    finally:
+        if fp is not input_filename_or_fp:
+            fp.close()
+
+
 def parse(input_filename_or_fp, use_iclicker_scores=False, debug=0):
     """
     This function parses a file object into iclicker responses.
     """
-    root = xml_load(input_filename_or_fp)
-    poll_list = [p for p in root if p.tag == "p"]
-    if not poll_list:
-        raise ParseError("not a valid i>clicker XML data file")
+    poll_count = 0
     correct_answer_list = []
     student_results = {}  # maps clicker ids to responses<list>, student_score<numeric>
-    for p in poll_list:
+    for p in iter_polls(input_filename_or_fp):
         # polls are questions asked.
+        poll_count += 1
         if p.attrib["isDel"] not in ["Y", "N"]:
             raise ParseError("Unknown delete marker {0!r}".format(p.attrib["isDel"]))
         if p.attrib["isDel"] == "Y":
@@ -59,6 +110,8 @@ def parse(input_filename_or_fp, use_iclicker_scores=False, debug=0):
                 else:
                     score = 1
             student_results[iclicker][1] += score
+    if not poll_count:
+        raise ParseError("not a valid i>clicker XML data file")
     return correct_answer_list, student_results
 
 
@@ -21,6 +21,10 @@ from ..models import Category, Role, Score, Task
 
 ################################################################
 
+BULK_BATCH_SIZE = 500
+
+################################################################
+
 ID_FIELD_NAMES = [
     "student number",
     "student id",
@@ -267,49 +271,93 @@ def _setup_tasks(viewport, save_column_headers, save_action_map, can_create):
 ################################################################
 
 
-def _get_student_person(st_id, id_field, viewport, all_sections):
+def _get_student_persons(st_id_list, id_field, viewport, all_sections):
+    """
+    Find the students of ``viewport`` (or, with ``all_sections``, of any
+    section of its ledger) for all the ids at once; returns the
+    ``(person_map, ambiguous)`` pair of ``RoleQuerySet.resolve_ids()``.
+    """
     role_qs = Role.objects.active().filter(role="st")
     if all_sections:
         viewport_qs = viewport.ledger.ledgerviewport_set.active()
-        role_qs = role_qs.filter(viewport__in=viewport_qs)
     else:
-        role_qs = role_qs.filter(viewport=viewport)
-    if type(st_id) == int:
-        id_field = "student id"
-    role_qs = role_qs.from_id(st_id, hint=id_field)
-    role_count = role_qs.count()
-    if role_count == 1:
-        role = role_qs.get()
-        return role.person
-    elif role_count == 0:
-        return None
-    # more than one role... could be only one person...
-    person_set = set(role_qs.values_list("person_id", flat=True))
-    if len(person_set) == 1:
-        return role_qs[0].person
-    else:
-        raise ValidationError("More than one person returned for id = {}".format(st_id))
+        viewport_qs = [viewport]
+    int_ids = [st_id for st_id in st_id_list if type(st_id) == int]
+    other_ids = [st_id for st_id in st_id_list if type(st_id) != int]
+    person_map, ambiguous = role_qs.resolve_ids(
+        int_ids, hint="student id", viewport_qs=viewport_qs
+    )
+    other_map, other_ambiguous = role_qs.resolve_ids(
+        other_ids, hint=id_field, viewport_qs=viewport_qs
+    )
+    person_map.update(other_map)
+    return person_map, ambiguous | other_ambiguous
 
 
 ################################################################
 
 
-def _save_student_scores(person, score_value_map, task_map):
-    count = 0
-    for name in score_value_map:
-        task = task_map.get(name, None)
-        # print(name, task)
-        if task is None:
-            continue
-        value = score_value_map.get(name)
-        if value is None:
-            value = ""
-        score, created = Score.objects.update_or_create(
-            person=person, task=task, defaults={"value": value}
+def _bulk_save_scores(value_map):
+    """
+    Save the ``{(person_id, task): value}`` scores with bulk queries;
+    then flag everything which depends on them, once.
+    Equivalent to ``Score.objects.update_or_create()`` for each, except
+    that unchanged scores are left alone.
+    """
+    from ..gb2.utils import taskstats
+    from ..gb2.utils.category_deps import category_deps_bulk
+    from ..gb2.utils.dirty import dirty_reverse_deps
+    from ..gb2.utils.notify import notify_calculate
+    from ..gb2.utils.pending import enqueue
+
+    task_list = list(set(task for person_id, task in value_map))
+    person_ids = set(person_id for person_id, task in value_map)
+    existing = dict(
+        ((s.person_id, s.task_id), s)
+        for s in Score.objects.filter(task__in=task_list, person_id__in=person_ids)
+        .select_related(None)
+        .only("pk", "person_id", "task_id", "value")
+    )
+    create_list = []
+    update_list = []
+    for (person_id, task), value in value_map.items():
+        value = "{}".format(value)
+        score = existing.get((person_id, task.pk))
+        if score is None:
+            create_list.append(Score(person_id=person_id, task=task, value=value))
+        elif score.value != value:
+            score.value = value
+            update_list.append(score)
+
+    Score.objects.bulk_create(create_list, batch_size=BULK_BATCH_SIZE)
+    if create_list and create_list[0].pk is None:
+        # only some databases return the new primary keys.
+        pk_map = dict(
+            ((person_id, task_id), pk)
+            for pk, person_id, task_id in Score.objects.filter(
+                task__in=task_list, person_id__in=person_ids
+            ).values_list("pk", "person_id", "task_id")
+        )
+        for s in create_list:
+            s.pk = pk_map[(s.person_id, s.task_id)]
+    Score.objects.bulk_update(update_list, ["value"], batch_size=BULK_BATCH_SIZE)
+
+    # what Score.save() and the post_save signals would have done:
+    changed = [s.pk for s in create_list + update_list]
+    if not changed:
+        return
+    by_ledger = {}
+    for s in create_list:
+        by_ledger.setdefault(s.task.ledger_id, set()).add(
+            (s.person_id, s.task.category_id)
         )
-        # print(person, score, created)
-        count += 1
-    return count
+    for ledger_id, pair_set in sorted(by_ledger.items()):
+        category_deps_bulk(ledger_id, sorted(pair_set))
+    taskstats.task_changed([s.task_id for s in create_list + update_list])
+    dirty_reverse_deps(changed)
+    enqueue(changed, "calc")
+    enqueue([s.pk for s in create_list], "deps")
+    notify_calculate()
 
 
 ################################################################
@@ -329,10 +377,18 @@ def marks_upload(
 
     mark_data = _load_scores(fileobj, id_field, save_column_headers)
     task_map = _setup_tasks(viewport, save_column_headers, save_action_map, can_create)
+    person_map, ambiguous = _get_student_persons(
+        list(mark_data), id_field, viewport, all_sections
+    )
     count = 0
     errors = []
+    value_map = {}
     for st_id in mark_data:
-        person = _get_student_person(st_id, id_field, viewport, all_sections)
+        if st_id in ambiguous:
+            raise ValidationError(
+                "More than one person returned for id = {}".format(st_id)
+            )
+        person = person_map[st_id]
         if person is None:
             if ignore_unknown_ids:
                 errors.append(str(st_id))
@@ -341,8 +397,16 @@ def marks_upload(
                 raise ValidationError(
                     "Could not find student with id = {}".format(st_id)
                 )
-        else:
-            count += _save_student_scores(person, mark_data[st_id], task_map)
+            continue
+        score_value_map = mark_data[st_id]
+        for name in score_value_map:
+            task = task_map.get(name, None)
+            if task is None:
+                continue
+            value = score_value_map.get(name)
+            value_map[(person.pk, task)] = "" if value is None else value
+            count += 1
+    _bulk_save_scores(value_map)
     return count, errors
 
 
@@ -1,21 +1,31 @@
 """
-Statistics helpers.  For a score queryset.
+Statistics helpers.  For a score queryset (or list of scores).
 """
 #######################################################################
 
 from __future__ import print_function, unicode_literals
 
-import gnuplot_data
+import math
+from collections import Counter
 
 from ..gb2.formulalib.formulacalc import FormulaCalc
+from . import histogram
+
+#######################################################################
+
+HISTOGRAM_BINS = 10
+QUANTILES = (0.25, 0.5, 0.75)
 
 #######################################################################
 
 
 def get_numeric_scores(score_qs):
-    values = [
-        FormulaCalc.floatNone(s) for s in score_qs.values_list("value", flat=True)
-    ]
+    if hasattr(score_qs, "values_list"):
+        value_list = score_qs.values_list("value", flat=True)
+    else:
+        # an already evaluated list of scores.
+        value_list = [s.value for s in score_qs]
+    values = [FormulaCalc.floatNone(s) for s in value_list]
     count_all = len(values)
     values = [v for v in values if v is not None]
     count = len(values)
@@ -25,6 +35,158 @@ def get_numeric_scores(score_qs):
 #######################################################################
 
 
+def iter_values(score_qs):
+    """
+    The score values, streamed from the database (or from an already
+    evaluated list of scores).
+    """
+    if hasattr(score_qs, "values_list"):
+        return score_qs.values_list("value", flat=True).iterator()
+    return (s.value for s in score_qs)
+
+
+#######################################################################
+
+
+class StatisticsAccumulator(object):
+    """
+    One pass (Welford) statistics of numeric score values.
+    Non-numeric values only count towards ``count_all``.
+    Distinct values are counted, for exact medians, quantiles and
+    histograms without keeping every value.
+    Accumulators can be merged, e.g., to combine viewports into a
+    ledger.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.count_all = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of (x - mean)**2
+        self.min = None
+        self.max = None
+        self.counter = Counter()
+
+    def add(self, value):
+        """
+        Add a score value (a string, as stored).
+        """
+        self.count_all += 1
+        x = FormulaCalc.floatNone(value)
+        if x is None:
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        self.counter[x] += 1
+
+    def update(self, value_iter):
+        for value in value_iter:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """
+        Combine the statistics of ``other`` into this accumulator.
+        """
+        self.count_all += other.count_all
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            self.counter = Counter(other.counter)
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.mean += delta * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.counter.update(other.counter)
+        return self
+
+    def _variance(self, avg, n):
+        # sum of (x - avg)**2 over the numeric values, divided by n - 1.
+        return (self.m2 + self.count * (self.mean - avg) ** 2) / (n - 1)
+
+    def quantile(self, q):
+        """
+        The ``q`` quantile (0 <= q <= 1) of the numeric values, linearly
+        interpolated between the closest ranks.
+        """
+        if self.count == 0:
+            return
+        position = q * (self.count - 1)
+        lower = int(math.floor(position))
+        upper = int(math.ceil(position))
+        lo = hi = None
+        seen = 0
+        for x, c in sorted(self.counter.items()):
+            seen += c
+            if lo is None and seen > lower:
+                lo = x
+            if seen > upper:
+                hi = x
+                break
+        return lo + (hi - lo) * (position - lower)
+
+    def statistics(self):
+        """
+        The dictionary of statistics; ``None`` if there are no numeric
+        values.
+        """
+        if self.count == 0:
+            return
+        count = self.count
+        result = {
+            "count": count,
+            "min": self.min,
+            "max": self.max,
+            "avg": self.mean,
+            "median": self.quantile(0.5),
+            "quantiles": dict((q, self.quantile(q)) for q in QUANTILES),
+        }
+        if count > 1:
+            result["variance"] = self._variance(self.mean, count)
+            result["stddev"] = result["variance"] ** 0.5
+
+        if count != self.count_all:
+            result["count_all"] = self.count_all
+            result["avg_all"] = self.mean * count / self.count_all
+            if self.count_all > 1:
+                result["variance_all"] = self._variance(
+                    result["avg_all"], self.count_all
+                )
+                result["stddev_all"] = result["variance_all"] ** 0.5
+
+        return result
+
+    def histogram_binwidth(self, nbins=HISTOGRAM_BINS):
+        return float(self.max - self.min) / nbins
+
+    def histogram_bins(self, nbins=HISTOGRAM_BINS):
+        """
+        The histogram bins, as ``(bin start, count)`` pairs; these are
+        the bins ``histogram_img()`` draws.
+        """
+        binwidth = self.histogram_binwidth(nbins)
+        counts = Counter()
+        for x, c in self.counter.items():
+            start = binwidth * math.floor(x / binwidth) if binwidth else x
+            counts[start] += c
+        return sorted(counts.items())
+
+
+#######################################################################
+
+
 def statistics(score_qs):
     """
     Calculate statistics for the given score queryset.
@@ -33,68 +195,66 @@ def statistics(score_qs):
     Returns ``None`` if this is not appropriate.
     Otherwise returns a dictionary of statistics.
     """
-    count, count_all, values = get_numeric_scores(score_qs)
-    if count == 0:
+    return StatisticsAccumulator().update(iter_values(score_qs)).statistics()
+
+
+#######################################################################
+
+
+def summarize(score_qs):
+    """
+    The ``StatisticsAccumulator`` of the score values; or ``None`` when
+    there are no numeric values.
+    """
+    acc = StatisticsAccumulator().update(iter_values(score_qs))
+    if acc.count == 0:
         return
+    return acc
+
 
-    S = float(sum(values))
-    result = {"count": count, "min": min(values), "max": max(values), "avg": S / count}
-    if count > 1:
-        result["variance"] = sum([(x - result["avg"]) ** 2 for x in values]) / (
-            count - 1
-        )
-        result["stddev"] = result["variance"] ** 0.5
+#######################################################################
 
-    if count != count_all:
-        result["count_all"] = count_all
-        result["avg_all"] = S / count_all
-        if count_all > 1:
-            result["variance_all"] = sum(
-                [(x - result["avg_all"]) ** 2 for x in values]
-            ) / (count_all - 1)
-            result["stddev_all"] = result["variance_all"] ** 0.5
 
-    return result
+def statistics_from_summary(summary):
+    """
+    As ``statistics()``, from a ``summarize()`` result.
+    """
+    if summary is None:
+        return
+    return summary.statistics()
 
 
 #######################################################################
 
 
-def histogram_img(score_qs, size="400,300"):
+def histogram_from_summary(summary, size="400,300"):
     """
-    Generate a histogram image for a score queryset.
-    Returns ``None`` if this is not appropriate (or the image construction fails).
+    The histogram image for a ``summarize()`` result.
+    Returns ``None`` if this is not appropriate.
     Otherwise returns a (datastream, content_type) pair.
     """
-    count, count_all, values = get_numeric_scores(score_qs)
-    if count < 1:
+    if summary is None:
         return
-    min_ = min(values)
-    max_ = max(values)
-
-    script = """set key off
-set style fill solid
-set style fill solid border -1
-binwidth=(%(max)s-%(min)s)/10
-set boxwidth binwidth
-set xrange [%(min)s-binwidth : %(max)s+binwidth]
-bin(x,width)=width*floor(x/width)
-""" % {
-        "max": max_,
-        "min": min_,
-    }
-    script += (
-        "plot '%(datafile)s' using (bin($1,binwidth)):(1.0) smooth freq with boxes lt 3"
+    img_data = histogram.render_svg(
+        summary.histogram_bins(),
+        summary.histogram_binwidth(),
+        summary.min,
+        summary.max,
+        size=size,
     )
+    return img_data, histogram.CONTENT_TYPE
 
-    terminal = "png transparent size " + size
-    content_type = "image/png"
 
-    img_data = gnuplot_data.Plot(data=values, script=script, terminal=terminal).plot()
-    if not img_data:
-        return
+#######################################################################
+
 
-    return img_data, content_type
+def histogram_img(score_qs, size="400,300"):
+    """
+    Generate a histogram image for a score queryset.
+    Returns ``None`` if this is not appropriate.
+    Otherwise returns a (datastream, content_type) pair.
+    """
+    return histogram_from_summary(summarize(score_qs), size=size)
 
 
 #######################################################################